@@ -8,7 +8,7 @@ color 0A
 :: ============================================================
 set "SCRIPT_DIR=%~dp0"
 set "SERVER_DIR=%SCRIPT_DIR%server"
-set "SERVER_SCRIPT=%SERVER_DIR%\app.py"
+set "SERVER_SCRIPT=%SERVER_DIR%\asgi.py"
 set "FFMPEG_DIR=%SCRIPT_DIR%ffmpeg"
 set "FFMPEG_EXE=%FFMPEG_DIR%\bin\ffmpeg.exe"
 set "VBS_LAUNCHER=%SCRIPT_DIR%start_server.vbs"
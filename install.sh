@@ -64,7 +64,7 @@ After=network.target
 [Service]
 Type=simple
 WorkingDirectory=$SERVER_DIR
-ExecStart=$SERVER_DIR/venv/bin/python $SERVER_DIR/app.py
+ExecStart=$SERVER_DIR/venv/bin/python $SERVER_DIR/asgi.py
 Restart=on-failure
 RestartSec=5
 Environment=PYTHONUNBUFFERED=1
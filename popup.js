@@ -205,6 +205,26 @@ function isValidYouTubeUrl(url) {
   return patterns.some(pattern => pattern.test(url));
 }
 
+// Fetch /api/info and unwrap server errors
+async function fetchInfo(infoUrl) {
+  const response = await fetch(infoUrl, {
+    signal: AbortSignal.timeout(30000)
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.error || 'Failed to get video information');
+  }
+
+  const data = await response.json();
+
+  if (data.error) {
+    throw new Error(data.error);
+  }
+
+  return data;
+}
+
 // Load video information
 async function loadVideoInfo() {
   try {
@@ -214,20 +234,15 @@ async function loadVideoInfo() {
       throw new Error('Please open a YouTube video and try again');
     }
 
-    const response = await fetch(`${API_BASE_URL}/info?url=${encodeURIComponent(url)}`, {
-      signal: AbortSignal.timeout(30000)
-    });
+    const infoUrl = `${API_BASE_URL}/info?url=${encodeURIComponent(url)}&mode=lite`;
 
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.error || 'Failed to get video information');
-    }
+    // For playlist URLs, ask for the playlist listing separately so the
+    // video card and qualities render without waiting for it
+    const playlistRequest = url.includes('list=')
+      ? fetchInfo(`${infoUrl}&fields=playlist`).catch(() => null)
+      : null;
 
-    const data = await response.json();
-
-    if (data.error) {
-      throw new Error(data.error);
-    }
+    const data = await fetchInfo(playlistRequest ? `${infoUrl}&fields=qualities` : infoUrl);
 
     currentVideoInfo = data;
     isPlaylist = data.is_playlist || false;
@@ -237,6 +252,15 @@ async function loadVideoInfo() {
     populateQualityOptions(data);
     showContent();
 
+    if (playlistRequest) {
+      const playlistData = await playlistRequest;
+      if (playlistData) {
+        Object.assign(currentVideoInfo, playlistData);
+        isPlaylist = playlistData.is_playlist || false;
+        displayPlaylistInfo(playlistData);
+      }
+    }
+
   } catch (error) {
     console.error('Error loading video info:', error);
     if (error.name === 'TimeoutError') {
@@ -358,6 +382,11 @@ async function handleDownload() {
       })
     });
 
+    if (response.status === 429) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(`⏳ Download queue is full, try again in ${errorData.retry_after || 30}s`);
+    }
+
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}));
       throw new Error(errorData.error || 'Download failed');
@@ -382,58 +411,111 @@ async function handleDownload() {
   }
 }
 
-// Poll download progress
+// Track download progress - SSE stream first, polling as fallback
 async function pollDownloadProgress(taskId) {
+  if (typeof EventSource !== 'undefined') {
+    const finished = await streamDownloadProgress(taskId);
+    if (finished) return;
+  }
+
   const maxAttempts = 1800; // 15 minutes for playlist
   let attempts = 0;
 
   while (attempts < maxAttempts) {
-    try {
-      const response = await fetch(`${API_BASE_URL}/progress/${taskId}`);
-      const data = await response.json();
+    const response = await fetch(`${API_BASE_URL}/progress/${taskId}`);
+    const data = await response.json();
 
-      // Update progress info
-      if (data.progress !== undefined) {
-        setProgress(data.progress);
-      }
+    if (handleProgressUpdate(data)) return;
 
-      // Update playlist and current song titles
-      if (data.is_playlist) {
-        if (data.playlist_title && elements.progressPlaylistTitle) {
-          elements.progressPlaylistTitle.textContent = `📋 ${data.playlist_title}`;
-        }
-        if (data.current_title && elements.progressCurrentTitle) {
-          elements.progressCurrentTitle.textContent = `🎵 ${data.current_title}`;
-        }
-        if (data.current && data.total && elements.progressLabel) {
-          elements.progressLabel.textContent = `Downloading ${data.current}/${data.total}...`;
-        }
-      }
+    await sleep(500);
+    attempts++;
+  }
 
-      if (data.status === 'completed') {
-        setProgress(100);
-        showStatus(`✅ Download complete! ${data.filename || 'Files saved to Downloads'}`, 'success');
-        return;
-      }
+  throw new Error('Download timeout');
+}
 
-      if (data.status === 'error') {
-        throw new Error(data.error || 'Download failed');
-      }
+// Listen to server-pushed progress updates.
+// Resolves true when the task finished, false if the stream broke and polling should take over.
+function streamDownloadProgress(taskId) {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE_URL}/progress/${taskId}/stream`);
 
-      if (data.status === 'cancelled') {
-        showStatus(`⚠️ Download cancelled`, 'warning');
-        return;
+    source.onmessage = (event) => {
+      try {
+        if (handleProgressUpdate(JSON.parse(event.data))) {
+          source.close();
+          resolve(true);
+        }
+      } catch (error) {
+        source.close();
+        reject(error);
       }
+    };
 
-      await sleep(500);
-      attempts++;
+    source.onerror = () => {
+      source.close();
+      resolve(false);
+    };
+  });
+}
+
+// Apply one progress update to the UI. Returns true when the task is finished.
+function handleProgressUpdate(data) {
+  // Update progress info
+  if (data.progress !== undefined) {
+    setProgress(data.progress);
+  }
 
-    } catch (error) {
-      throw error;
+  // Show queue position while waiting for a free worker
+  if (data.status === 'queued') {
+    if (elements.progressLabel) {
+      elements.progressLabel.textContent = data.queue_position ? `Queued (#${data.queue_position})...` : 'Queued...';
     }
+  } else if (data.status === 'processing' && !data.is_playlist && elements.progressLabel) {
+    const step = data.processing_progress != null ? ` ${Math.round(data.processing_progress)}%` : '';
+    elements.progressLabel.textContent = `Converting...${step}`;
+  } else if (!data.is_playlist && elements.progressLabel) {
+    elements.progressLabel.textContent = `Downloading...${formatTransfer(data)}`;
   }
 
-  throw new Error('Download timeout');
+  // Update playlist and current song titles
+  if (data.is_playlist) {
+    if (data.playlist_title && elements.progressPlaylistTitle) {
+      elements.progressPlaylistTitle.textContent = `📋 ${data.playlist_title}`;
+    }
+    if (data.current_title && elements.progressCurrentTitle) {
+      elements.progressCurrentTitle.textContent = `🎵 ${data.current_title}`;
+    }
+    if (data.current && data.total && elements.progressLabel) {
+      elements.progressLabel.textContent = `Downloading ${data.current}/${data.total}...${formatTransfer(data)}`;
+    }
+  }
+
+  if (data.status === 'completed') {
+    setProgress(100);
+    showStatus(`✅ Download complete! ${data.filename || 'Files saved to Downloads'}`, 'success');
+    return true;
+  }
+
+  if (data.status === 'error') {
+    throw new Error(data.error || 'Download failed');
+  }
+
+  if (data.status === 'cancelled') {
+    showStatus(`⚠️ Download cancelled`, 'warning');
+    return true;
+  }
+
+  return false;
+}
+
+// Format speed and ETA reported by the server, e.g. " 3.2 MB/s · 0:42 left"
+function formatTransfer(data) {
+  if (!data.speed) return '';
+  const speed = data.speed >= 1024 * 1024
+    ? `${(data.speed / (1024 * 1024)).toFixed(1)} MB/s`
+    : `${Math.round(data.speed / 1024)} KB/s`;
+  return data.eta ? ` ${speed} · ${formatDuration(data.eta)} left` : ` ${speed}`;
 }
 
 // Handle cancel download
@@ -570,7 +652,7 @@ async function resumeDownloadProgress(taskId) {
     }
 
     // Still downloading - show dedicated progress UI
-    if (data.status === 'downloading' || data.status === 'starting' || data.status === 'processing') {
+    if (data.status === 'queued' || data.status === 'downloading' || data.status === 'starting' || data.status === 'processing') {
       isDownloading = true;
 
       // Show content but hide video card and options
@@ -4,14 +4,36 @@ Flask API server with Sleep/Wake functionality and Playlist support
 """
 
 import os
+import contextlib
+import functools
+import gc
+import itertools
+import json
 import uuid
 import threading
 import time
 import re
-import tempfile
-from flask import Flask, request, jsonify
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import yt_dlp
+
+from bandwidth import BandwidthLimiter
+from cache import InfoCache, stream_url_ttl
+from cookie_cache import CookieFileCache
+from events import TaskEvents
+from journal import JobJournal
+from media_index import MediaIndex, BEST_VIDEO_SELECTOR
+from tasks import TaskRegistry, TERMINAL_STATUSES
+from metadata_store import MetadataStore, trim_video_info, trim_playlist_info
+from metrics import MetricsRegistry, BYTE_BUCKETS
+from pipeline import CpuTimer, ProcessingPool
+from playlist_pager import PlaylistPager
+from profiling import Profiler
+from scheduler import DownloadScheduler, QueueFullError
+from ydl_pool import YoutubeDLPool, yt_dlp_version
 
 app = Flask(__name__)
 CORS(app)
@@ -24,13 +46,182 @@ class ServerState:
 server_state = ServerState.SLEEPING
 last_activity_time = time.time()
 IDLE_TIMEOUT = 180  # 3 minutes
+# Set on wake-up so the idle checker, which otherwise sleeps until the next
+# possible deadline (or indefinitely while SLEEPING), re-reads the state
+state_changed = threading.Event()
 
 # Download folder
 DOWNLOAD_FOLDER = os.path.join(os.path.expanduser('~'), 'Downloads')
 os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
 
-# Download tasks
-download_tasks = {}
+# Download tasks - finished tasks are evicted after FINISHED_TASK_TTL or beyond MAX_FINISHED_TASKS
+MAX_FINISHED_TASKS = 100
+FINISHED_TASK_TTL = 3600
+task_events = TaskEvents()
+download_tasks = TaskRegistry(max_finished=MAX_FINISHED_TASKS, finished_ttl=FINISHED_TASK_TTL,
+                              on_update=task_events.publish, on_create=task_events.track, on_remove=task_events.discard)
+
+# Server-Sent Events progress stream
+SSE_MAX_UPDATES_PER_SECOND = 4
+SSE_KEEPALIVE_SECONDS = 15
+
+# Download scheduler - single and playlist jobs share the same pool
+MAX_CONCURRENT_DOWNLOADS = 3
+MAX_QUEUED_DOWNLOADS = 20
+scheduler = DownloadScheduler(max_workers=MAX_CONCURRENT_DOWNLOADS, max_queue=MAX_QUEUED_DOWNLOADS)
+
+# Held for every yt-dlp download - single jobs and playlist entries alike - so
+# total parallelism stays MAX_CONCURRENT_DOWNLOADS however many playlists run
+download_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
+# Progress hook throttling - publish at most every 250 ms unless progress jumps 1%
+PROGRESS_MIN_INTERVAL = 0.25
+PROGRESS_MIN_STEP = 1.0
+
+# Download engine - server defaults; per-job overrides are clamped to these limits
+CONCURRENT_FRAGMENTS = 4
+MAX_CONCURRENT_FRAGMENTS = 16
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024  # 0 = extractor default
+MAX_HTTP_CHUNK_SIZE = 100 * 1024 * 1024
+EXTERNAL_DOWNLOADER = None
+ALLOWED_EXTERNAL_DOWNLOADERS = ('aria2c', 'axel', 'curl', 'wget')
+
+# Bandwidth shaping - BANDWIDTH_LIMIT bytes/sec shared by all downloads (0 = unlimited),
+# split between jobs by weight. Small read blocks keep the shaped rate smooth.
+BANDWIDTH_LIMIT = 0
+BANDWIDTH_BLOCK_SIZE = 64 * 1024
+MIN_BANDWIDTH_WEIGHT = 0.1
+MAX_BANDWIDTH_WEIGHT = 10.0
+bandwidth = BandwidthLimiter(rate=BANDWIDTH_LIMIT)
+
+# Batch downloads - children run on the shared scheduler like single downloads
+MAX_DOWNLOAD_BATCH_SIZE = 200
+VIDEO_ID_PATTERN = re.compile(r'[a-zA-Z0-9_-]{11}')  # as matched by extract_video_id
+batch_lock = threading.Lock()
+
+# Playlist entries downloaded in parallel per playlist job (within download_slots)
+PLAYLIST_CONCURRENCY = 3
+MAX_PLAYLIST_CONCURRENCY = 8
+
+# Playlist listings are paged; downloads enumerate lazily up to MAX_PLAYLIST_ENTRIES
+PLAYLIST_PAGE_SIZE = 50
+MAX_PLAYLIST_ENTRIES = 5000
+
+# Extraction results keyed by video/playlist ID - TTL is further capped by stream URL expiry
+INFO_CACHE_SIZE = 200
+INFO_CACHE_TTL = 4 * 3600
+info_cache = InfoCache(max_entries=INFO_CACHE_SIZE, ttl=INFO_CACHE_TTL)
+
+# Parts of /api/info a client can ask for with ?fields=
+INFO_FIELDS = ('playlist', 'qualities')
+
+# ?mode=lite - only what the popup shows. Skips DASH/HLS manifests and
+# translated subtitles, and returns the raw extractor result without
+# yt-dlp's format selection pass (process=False).
+LITE_INFO_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'getcomments': False,
+    'writesubtitles': False,
+    'extractor_args': {'youtube': {'skip': ['dash', 'hls', 'translated_subs']}}
+}
+
+# Batch info lookups share one bounded extraction pool
+INFO_BATCH_WORKERS = 4
+MAX_INFO_BATCH_SIZE = 100
+info_executor = ThreadPoolExecutor(max_workers=INFO_BATCH_WORKERS, thread_name_prefix='info')
+
+# /api/info's playlist listing runs alongside its video lookup on a pool of its own,
+# so the popup never waits behind a batch filling info_executor
+PLAYLIST_LOOKUP_WORKERS = 2
+playlist_lookup_executor = ThreadPoolExecutor(max_workers=PLAYLIST_LOOKUP_WORKERS, thread_name_prefix='playlist-lookup')
+
+# The popup looks videos up in lite mode, but a download reuses a cached full info
+# dict - so a lite /api/info also extracts full info in the background, once per video
+INFO_PREFETCH_WORKERS = 2
+info_prefetch_executor = ThreadPoolExecutor(max_workers=INFO_PREFETCH_WORKERS, thread_name_prefix='info-prefetch')
+info_prefetches = {}  # video_id -> Future of its background full extraction
+info_prefetch_lock = threading.Lock()
+
+# Pooled YoutubeDL instances - extractor setup, cookie jar and keep-alive
+# connections are reused by jobs with the same option profile and cookies
+YDL_POOL_MAX_IDLE = 16
+YDL_POOL_IDLE_TTL = 600
+INFO_OPTIONS = {'quiet': True, 'no_warnings': True}
+PLAYLIST_OPTIONS = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'}
+ydl_pool = YoutubeDLPool(max_idle=YDL_POOL_MAX_IDLE, idle_ttl=YDL_POOL_IDLE_TTL, factory=lambda opts: build_ydl(opts))
+
+# Playlist listings stay open (with their ydl checked out) between page requests,
+# so fetching the next page continues the enumeration instead of restarting it
+PLAYLIST_LISTINGS_MAX_OPEN = 8
+PLAYLIST_LISTING_IDLE_TTL = 600
+playlist_pager = PlaylistPager(lambda playlist_id, cookie_file: open_playlist_listing(playlist_id, cookie_file),
+                               max_open=PLAYLIST_LISTINGS_MAX_OPEN, idle_ttl=PLAYLIST_LISTING_IDLE_TTL)
+
+# yt_dlp is imported on first use, not at startup (most of the cold start time
+# otherwise). Waking up pre-warms the popup's lookups in the background.
+PREWARM_PROFILES = (('lite', LITE_INFO_OPTIONS),)
+prewarm_lock = threading.Lock()
+
+# Post-processing (merge, audio extract) runs after the fetch on its own pool,
+# so a slow transcode never holds a download slot. Capped at the core count.
+PROCESSING_WORKERS = os.cpu_count() or 2
+processing_pool = ProcessingPool(max_workers=PROCESSING_WORKERS)
+
+# A fetch takes one of these before it starts and its processing job gives it back, so
+# fetching runs at most PROCESSING_BACKLOG downloads ahead of post-processing (plus the
+# fetches in flight) - each one waiting there holds files, memory and pooled ydls
+PROCESSING_BACKLOG = PROCESSING_WORKERS * 2
+processing_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS + PROCESSING_BACKLOG)
+
+# Cookie files are shared by jobs sending the same cookies until the earliest one expires
+MAX_COOKIE_FILES = 32
+SESSION_COOKIE_TTL = 3600
+cookie_files = CookieFileCache(max_files=MAX_COOKIE_FILES, session_ttl=SESSION_COOKIE_TTL, on_expire=ydl_pool.discard)
+
+# Persistent metadata (titles, format lists, playlist entries) - survives restarts.
+# Playlist pages change as videos are added or removed, so they expire with the info cache.
+METADATA_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metadata.db')
+metadata_store = MetadataStore(METADATA_DB, yt_dlp_version(), kind_max_age={'playlist': INFO_CACHE_TTL})
+
+# Audio: a 'bestaudio[abr<=N]' quality is transcoded to an N kbps mp3 (at most MP3_BITRATE);
+# the NATIVE_AUDIO quality keeps the source stream (m4a/opus) and only remuxes it
+MP3_BITRATE = 320
+NATIVE_AUDIO = 'native'
+AUDIO_BITRATE_CAP = re.compile(r'abr<=(\d+)')
+
+# Index of finished downloads (same database) - repeated requests reuse the file on disk,
+# and mp3s can be transcoded locally from an existing download instead of fetched again
+FFMPEG_PATH = shutil.which('ffmpeg')
+media_index = MediaIndex(METADATA_DB)
+
+# Write-ahead job journal - unfinished jobs are re-queued on the next start
+JOB_JOURNAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.journal')
+job_journal = JobJournal(JOB_JOURNAL)
+
+# Prometheus metrics at /metrics - histograms and counters are recorded by the
+# workers and progress hooks, gauges are only read when scraped
+metrics = MetricsRegistry('tatarus')
+extract_seconds = metrics.histogram('extract_info_seconds', 'yt-dlp extraction latency', ('kind',))
+queue_wait_seconds = metrics.histogram('queue_wait_seconds', 'Time from submission until a download worker starts the job')
+download_seconds = metrics.histogram('download_seconds', 'Duration of successful downloads - the fetch stage, or the whole job for playlists', ('kind',))
+download_bytes = metrics.histogram('download_bytes', 'Size of each downloaded file', buckets=BYTE_BUCKETS)
+processing_seconds = metrics.histogram('post_processing_seconds', 'Post-processing (merge, ffmpeg) stage duration')
+errors_total = metrics.counter('errors_total', 'Failures by stage and exception class', ('stage', 'exception'))
+metrics.gauge('active_jobs', 'Downloads holding a scheduler slot', lambda: scheduler.stats()['running'])
+metrics.gauge('queued_jobs', 'Downloads waiting for a scheduler slot', lambda: scheduler.stats()['queued'])
+metrics.gauge('processing_jobs', 'Downloads in the post-processing stage', lambda: processing_pool.stats()['running'])
+metrics.gauge('tasks', 'Task records held in memory', lambda: len(download_tasks))
+metrics.gauge('idle_seconds', 'Seconds since the last API activity', lambda: time.time() - last_activity_time)
+metrics.gauge('awake', '1 while the server is awake', lambda: int(server_state == ServerState.AWAKE))
+
+# On-demand profiling (admin API) - stack samples and a phase timeline for one task
+# or the next N info requests; costs a dict lookup per hook while nothing is profiled
+PROFILE_INTERVAL = 0.01
+PROFILE_MAX_SECONDS = 600
+MAX_PROFILE_INFO_REQUESTS = 100
+profiler = Profiler(interval=PROFILE_INTERVAL, is_finished=lambda task_id: task_finished(task_id))
 
 
 def update_activity():
@@ -39,27 +230,202 @@ def update_activity():
     last_activity_time = time.time()
 
 
+def record_error(stage, error):
+    """Count a failure for /metrics"""
+    errors_total.inc(stage, type(error).__name__)
+
+
+def observe_queue_wait(task_id):
+    task = download_tasks.get(task_id)
+    if task is not None:
+        now = time.time()
+        queue_wait_seconds.observe(now - task.created_at)
+        profiler.record(task_id, 'queued', task.created_at, now)
+
+
+def task_finished(task_id):
+    task = download_tasks.get(task_id)
+    return task is None or task.status in TERMINAL_STATUSES
+
+
+def profiled(worker):
+    """Run a `worker(task_id, ...)` attached to its task for on-demand profiling"""
+    @functools.wraps(worker)
+    def wrapper(task_id, *args, **kwargs):
+        with profiler.attach(task_id):
+            return worker(task_id, *args, **kwargs)
+    return wrapper
+
+
+def profiled_info(endpoint):
+    """Let an info endpoint be picked up by a pending info profiling session"""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        with profiler.info_request(request.args.get('url', '')):
+            return endpoint(*args, **kwargs)
+    return wrapper
+
+
+def update_task(task_id, **fields):
+    """Update a download task, journal status changes and notify progress stream listeners"""
+    task = download_tasks.update(task_id, **fields)
+    if task is not None and 'status' in fields:
+        job_journal.record(task_id, task.status)
+    if task is not None and task.parent_id is not None:
+        refresh_batch(task.parent_id)
+
+
+def refresh_batch(parent_id):
+    """Recompute a batch task's aggregate state from its children"""
+    with batch_lock:
+        parent = download_tasks.get(parent_id)
+        if parent is None:
+            return
+        children = [child for child in map(download_tasks.get, parent.children) if child is not None]
+        
+        # Children without byte counts yet are weighted by the average known size
+        sized = [child for child in children if child.total_bytes]
+        downloaded = sum(child.downloaded_bytes for child in sized)
+        known_total = sum(child.total_bytes for child in sized)
+        completed = sum(1 for child in children if child.status == 'completed')
+        failed = sum(1 for child in children if child.status == 'error')
+        finished = sum(1 for child in children if child.status in TERMINAL_STATUSES)
+        
+        if sized:
+            estimated_total = known_total + (len(children) - len(sized)) * (known_total / len(sized))
+            progress = (downloaded / estimated_total) * 100
+        else:
+            progress = (finished / len(children)) * 100 if children else 0
+        
+        fields = {
+            'progress': min(progress, 100),
+            'downloaded_bytes': downloaded,
+            'total_bytes': known_total,
+            'completed_count': completed,
+            'failed_count': failed,
+            'speed': sum(child.speed or 0 for child in children) or None
+        }
+        
+        if finished == len(children):
+            if parent.cancelled:
+                fields['status'] = 'cancelled'
+            elif completed == 0 and failed:
+                fields['status'] = 'error'
+                fields['error'] = f'All {failed} downloads failed'
+            else:
+                fields['status'] = 'completed'
+                fields['progress'] = 100
+            fields['filename'] = f'{completed} files downloaded' + (f' ({failed} failed)' if failed else '')
+            if parent.cancelled:
+                fields['filename'] += ' (cancelled)'
+        elif parent.status == 'queued' and any(child.status != 'queued' for child in children):
+            fields['status'] = 'downloading'
+        
+        download_tasks.update(parent_id, **fields)
+
+
 def check_idle_and_sleep():
-    """Background thread to check idle time and put server to sleep"""
-    global server_state
+    """Background thread to put the server to sleep IDLE_TIMEOUT after the last activity.
+
+    Wakes up only at the earliest moment the timeout can have passed, and
+    not at all while SLEEPING. Running or queued downloads keep it awake.
+    """
     while True:
-        time.sleep(60)
-        if server_state == ServerState.AWAKE:
-            idle_time = time.time() - last_activity_time
-            if idle_time >= IDLE_TIMEOUT:
-                server_state = ServerState.SLEEPING
-                print(f"\n💤 Server going to SLEEP now!! {IDLE_TIMEOUT//60} min idle...")
+        state_changed.clear()
+        if server_state == ServerState.SLEEPING:
+            state_changed.wait()
+            continue
+        remaining = last_activity_time + IDLE_TIMEOUT - time.time()
+        if remaining > 0:
+            state_changed.wait(remaining)
+        elif jobs_in_flight():
+            state_changed.wait(IDLE_TIMEOUT)
+        else:
+            go_to_sleep()
+
+
+def jobs_in_flight():
+    scheduler_stats = scheduler.stats()
+    return bool(scheduler_stats['running'] or scheduler_stats['queued'] or processing_pool.stats()['running'])
+
+
+def go_to_sleep():
+    """Switch to SLEEPING and release what is rebuilt on demand after wake-up"""
+    global server_state
+    server_state = ServerState.SLEEPING
+    rss_before = current_rss_mb()
+    release_memory()
+    freed = f" - RSS {rss_before} → {current_rss_mb()} MB" if rss_before is not None else ""
+    print(f"\n💤 Server going to SLEEP now!! {IDLE_TIMEOUT//60} min idle...{freed}")
+
+
+def release_memory():
+    """Drop pooled YoutubeDL instances (and their extractors), cookie files and
+    cached info dicts, then collect garbage and hand freed heap back to the OS"""
+    playlist_pager.clear()
+    ydl_pool.clear()
+    cookie_files.clear()
+    info_cache.clear()
+    gc.collect()
+    trim_heap()
+
+
+def trim_heap():
+    """Return free heap pages to the OS - glibc only, a no-op elsewhere"""
+    import ctypes
+    try:
+        ctypes.CDLL(None).malloc_trim(0)
+    except (AttributeError, OSError, TypeError):
+        pass
+
+
+def current_rss_mb():
+    """Current resident set size (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+def prewarm():
+    """Import yt_dlp and build the info extractors, so the first /api/info after
+    wake-up doesn't pay for it - run in the background by /api/wakeup"""
+    if not prewarm_lock.acquire(blocking=False):
+        return
+    try:
+        started = time.perf_counter()
+        for profile, opts in PREWARM_PROFILES:
+            ydl_pool.warm(profile, opts, prepare=lambda ydl: ydl.get_info_extractor('Youtube'))
+        print(f"🔥 Pre-warmed in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        record_error('prewarm', e)
+        print(f"Pre-warm failed: {e}")
+    finally:
+        prewarm_lock.release()
+
+
+def build_ydl(opts):
+    """`ydl_pool` factory - the first call imports yt_dlp"""
+    from staged_ydl import StagedYoutubeDL
+    return StagedYoutubeDL(opts)
+
+
+def sleeping_error():
+    """503 body for protected endpoints while SLEEPING"""
+    return {
+        'error': 'Server is sleeping',
+        'state': server_state,
+        'message': 'Call /api/wakeup first'
+    }
 
 
 def require_awake(f):
     """Decorator to require AWAKE state for endpoints"""
     def wrapper(*args, **kwargs):
         if server_state == ServerState.SLEEPING:
-            return jsonify({
-                'error': 'Server is sleeping',
-                'state': server_state,
-                'message': 'Call /api/wakeup first'
-            }), 503
+            return jsonify(sleeping_error()), 503
         return f(*args, **kwargs)
     wrapper.__name__ = f.__name__
     return wrapper
@@ -91,6 +457,127 @@ def extract_playlist_id(url):
     return None
 
 
+def cache_key(kind, item_id):
+    """Info cache key for a video or playlist ID"""
+    return f'{kind}:{item_id}' if item_id else None
+
+
+def fetch_video_info(url, use_store=True, lite=False):
+    """Get single video info from the info cache, then the metadata store, then yt-dlp.
+
+    A metadata store hit is a trimmed dict (no stream URLs) - enough for
+    `extract_qualities` and the popup, but not for downloading. So is a
+    `lite` extraction, which is cached and stored separately from full
+    info dicts - a lite lookup may use full results, never the reverse.
+    """
+    video_id = extract_video_id(url)
+    key = cache_key('video', video_id)
+    info = info_cache.get(key, cache_key('lite', video_id)) if lite else info_cache.get(key)
+    if info is None and use_store:
+        info = metadata_store.get('video', video_id)
+    if info is None and use_store and lite:
+        info = metadata_store.get('lite', video_id)
+    if info is None and lite:
+        with ydl_pool.checkout('lite', LITE_INFO_OPTIONS) as ydl, extract_seconds.time('lite'), profiler.span('extract lite'):
+            info = trim_video_info(ydl.extract_info(url, download=False, process=False))
+        info_cache.set(cache_key('lite', video_id), info)
+        metadata_store.put('lite', video_id, info)
+    elif info is None:
+        with ydl_pool.checkout('info', INFO_OPTIONS) as ydl, extract_seconds.time('info'), profiler.span('extract info'):
+            info = ydl.extract_info(url, download=False)
+        info_cache.set(key, info, stream_url_ttl(info))
+        metadata_store.put('video', video_id, trim_video_info(info))
+    return info
+
+
+def fetch_playlist_info(playlist_id, cookie_file=None, use_store=True, start=0):
+    """Get one page of a flat playlist listing from the info cache, then the metadata store, then yt-dlp.
+
+    Pages hold PLAYLIST_PAGE_SIZE entries starting at offset `start`. The
+    enumeration behind a page is parked in `playlist_pager`, so the next
+    page carries on from there rather than walking the playlist again.
+    """
+    page_id = f'{playlist_id}@{start}' if playlist_id else None
+    key = cache_key('playlist', page_id)
+    playlist_info = info_cache.get(key)
+    if playlist_info is None and use_store:
+        playlist_info = metadata_store.get('playlist', page_id)
+    if playlist_info is None:
+        with extract_seconds.time('playlist'), profiler.span('extract playlist'):
+            info, entries, has_more = playlist_pager.page(playlist_id, start, PLAYLIST_PAGE_SIZE,
+                                                          cookie_file=cookie_file, cookie_id=cookie_file)
+        playlist_info = trim_playlist_info({**info, 'entries': entries})
+        playlist_info['has_more'] = has_more
+        info_cache.set(key, playlist_info)
+        metadata_store.put('playlist', page_id, playlist_info)
+    return playlist_info
+
+
+def open_playlist_listing(playlist_id, cookie_file=None):
+    """Start a lazy flat enumeration of a playlist for `playlist_pager`.
+
+    Returns (info dict, entries iterator, close). process=False keeps the
+    entries a generator that fetches continuation pages as it is read - it
+    pages through the ydl, so that stays checked out until `close`.
+    """
+    playlist_url = f'https://www.youtube.com/playlist?list={playlist_id}'
+    ydl_opts = dict(PLAYLIST_OPTIONS)
+    if cookie_file:
+        ydl_opts['cookiefile'] = cookie_file
+    
+    stack = contextlib.ExitStack()
+    try:
+        ydl = stack.enter_context(ydl_pool.checkout('playlist', ydl_opts, cookie_id=cookie_file))
+        info = ydl.extract_info(playlist_url, download=False, process=False)
+        if info.get('_type') in ('url', 'url_transparent'):
+            info = ydl.extract_info(info['url'], download=False, process=False)
+    except BaseException:
+        stack.close()
+        raise
+    entries = itertools.islice((entry for entry in info.pop('entries', None) or [] if entry), MAX_PLAYLIST_ENTRIES)
+    return info, entries, stack.close
+
+
+def playlist_cursor(playlist_info, start):
+    """Opaque cursor for the page after the one starting at `start`, or None"""
+    return str(start + PLAYLIST_PAGE_SIZE) if playlist_info.get('has_more') else None
+
+
+def prefetch_full_info(url):
+    """Extract full info for `url` in the background, unless it is cached or already on its way"""
+    video_id = extract_video_id(url)
+    if not video_id or cache_key('video', video_id) in info_cache:
+        return
+    with info_prefetch_lock:
+        if video_id in info_prefetches:
+            return
+        future = info_prefetches[video_id] = info_prefetch_executor.submit(fetch_video_info, url, False)
+    
+    def forget(future):
+        with info_prefetch_lock:
+            info_prefetches.pop(video_id, None)
+        if future.exception() is not None:
+            record_error('info', future.exception())
+    
+    future.add_done_callback(forget)
+
+
+def download_with_cache(ydl, url):
+    """Download `url`, reusing a cached info dict instead of extracting again.
+
+    A background full extraction of the same video is waited for rather
+    than duplicated.
+    """
+    video_id = extract_video_id(url)
+    prefetch = info_prefetches.get(video_id)
+    if prefetch is not None:
+        wait([prefetch])
+    cached_info = info_cache.get(cache_key('video', video_id))
+    if cached_info is not None:
+        return ydl.process_ie_result(ydl.sanitize_info(cached_info), download=True)
+    return ydl.extract_info(url, download=True)
+
+
 # =============================================================================
 # Core Endpoints
 # =============================================================================
@@ -100,16 +587,39 @@ def get_status():
     """Get server status - always available"""
     return jsonify({
         'state': server_state,
-        'idle_timeout': IDLE_TIMEOUT
+        'idle_timeout': IDLE_TIMEOUT,
+        'scheduler': scheduler.stats(),
+        'processing': processing_pool.stats(),
+        'download_engine': download_engine({}),
+        'bandwidth': bandwidth.stats(),
+        'tasks': download_tasks.status_counts(),
+        'info_cache': info_cache.stats(),
+        'ydl_pool': ydl_pool.stats(),
+        'playlist_pager': playlist_pager.stats(),
+        'cookie_files': cookie_files.stats(),
+        'metadata_store': metadata_store.stats(),
+        'journal': job_journal.stats(),
+        'media_index': media_index.stats(),
+        'memory': {'rss_mb': current_rss_mb(), 'yt_dlp_loaded': 'yt_dlp' in sys.modules}
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics - always available"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/wakeup', methods=['GET', 'POST'])
 def wakeup():
     """Wake up the server - always available"""
     global server_state
+    was_sleeping = server_state == ServerState.SLEEPING
     server_state = ServerState.AWAKE
     update_activity()
+    state_changed.set()
+    if was_sleeping:
+        threading.Thread(target=prewarm, name='prewarm', daemon=True).start()
     print("⚡ Server AWAKE!")
     return jsonify({
         'state': server_state,
@@ -126,12 +636,88 @@ def health_check():
     })
 
 
+@app.route('/api/admin/bandwidth', methods=['GET', 'POST'])
+def admin_bandwidth():
+    """Show or change the global bandwidth limit and per-job weights - always available
+
+    POST {"rate": bytes/sec (0 = unlimited), "weights": {task_id: weight}}
+    """
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        try:
+            rate = max(0, int(data['rate'])) if 'rate' in data else None
+            weights = {task_id: bandwidth_weight(weight) for task_id, weight in (data.get('weights') or {}).items()}
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid bandwidth setting: {e}'}), 400
+        if rate is not None:
+            bandwidth.set_rate(rate)
+            print(f"🚦 Bandwidth limit set to {f'{rate} B/s' if rate else 'unlimited'}")
+        unknown = [task_id for task_id, weight in weights.items() if not bandwidth.set_weight(task_id, weight)]
+        return jsonify({**bandwidth.stats(), 'unknown_jobs': unknown})
+    return jsonify(bandwidth.stats())
+
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """List profiling sessions, or start one - always available
+
+    POST {"task_id": ...} profiles a queued or running download until it finishes,
+    POST {"info_requests": N} the next N /api/info requests.
+    "seconds" caps either session (default and maximum PROFILE_MAX_SECONDS).
+    """
+    if request.method == 'GET':
+        return jsonify({'sessions': profiler.sessions()})
+    
+    data = request.get_json() or {}
+    try:
+        seconds = max(1.0, min(float(data.get('seconds', PROFILE_MAX_SECONDS)), PROFILE_MAX_SECONDS))
+        info_requests = int(data.get('info_requests', 0))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid profiling setting: {e}'}), 400
+    
+    task_id = data.get('task_id')
+    if task_id:
+        if task_finished(task_id):
+            return jsonify({'error': 'Task not found or already finished'}), 404
+        session_id = profiler.profile_task(task_id, seconds)
+    elif 0 < info_requests <= MAX_PROFILE_INFO_REQUESTS:
+        session_id = profiler.profile_info(info_requests, seconds)
+    else:
+        return jsonify({'error': f'task_id or info_requests (1-{MAX_PROFILE_INFO_REQUESTS}) is required'}), 400
+    
+    print(f"🔬 Profiling session {session_id} started")
+    return jsonify({'session_id': session_id})
+
+
+@app.route('/api/admin/profile/<session_id>', methods=['GET', 'DELETE'])
+def admin_profile_session(session_id):
+    """Phase timeline of a profiling session (GET) or stop it early (DELETE) - always available"""
+    if request.method == 'DELETE':
+        if not profiler.stop(session_id):
+            return jsonify({'error': 'Session not found'}), 404
+    timeline = profiler.timeline(session_id)
+    if timeline is None:
+        return jsonify({'error': 'Session not found'}), 404
+    return jsonify(timeline)
+
+
+@app.route('/api/admin/profile/<session_id>/stacks', methods=['GET'])
+def admin_profile_stacks(session_id):
+    """Sampled stacks in folded format (flamegraph.pl, speedscope) - always available"""
+    folded = profiler.folded(session_id)
+    if folded is None:
+        return jsonify({'error': 'Session not found'}), 404
+    return Response(folded, mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={session_id}.folded'})
+
+
 # =============================================================================
 # Protected Endpoints (require AWAKE state)
 # =============================================================================
 
 @app.route('/api/info', methods=['GET'])
 @require_awake
+@profiled_info
 def get_video_info():
     """Get video/playlist information - requires AWAKE"""
     update_activity()
@@ -140,94 +726,157 @@ def get_video_info():
     if not url:
         return jsonify({'error': 'URL is required'}), 400
     
+    fields = set(request.args.get('fields', ','.join(INFO_FIELDS)).split(','))
+    if not fields or not fields <= set(INFO_FIELDS):
+        return jsonify({'error': f'fields must be a comma-separated subset of {", ".join(INFO_FIELDS)}'}), 400
+    
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'lite'):
+        return jsonify({'error': 'mode must be full or lite'}), 400
+    lite = mode == 'lite'
+    
     try:
         is_playlist = is_playlist_url(url)
         video_id = extract_video_id(url)
         
-        # For playlist URLs, try to extract playlist info
+        # For playlist URLs, extract the playlist listing and the current video concurrently
         if is_playlist:
             playlist_id = extract_playlist_id(url)
-            video_id = extract_video_id(url)
+            response = {
+                'playlist_id': playlist_id,
+                'current_video_id': video_id
+            }
             
-            playlist_videos = []
-            playlist_title = 'Playlist'
+            playlist_lookup = None
+            if 'playlist' in fields and 'qualities' in fields:
+                playlist_lookup = playlist_lookup_executor.submit(fetch_playlist_info, playlist_id).result
+            elif 'playlist' in fields:
+                # Nothing to overlap with - look it up on this thread
+                playlist_lookup = functools.partial(fetch_playlist_info, playlist_id)
             
-            # Try to get playlist info
-            try:
-                playlist_url = f'https://www.youtube.com/playlist?list={playlist_id}'
-                ydl_opts = {
-                    'quiet': True, 
-                    'no_warnings': True,
-                    'extract_flat': 'in_playlist',
-                    'playlistend': 50
-                }
+            if 'qualities' in fields:
+                single_url = f'https://www.youtube.com/watch?v={video_id}' if video_id else url
+                response.update(video_summary(fetch_video_info(single_url, lite=lite)))
+                if lite:
+                    prefetch_full_info(single_url)
+            
+            if playlist_lookup is not None:
+                playlist_videos = []
+                playlist_title = 'Playlist'
+                playlist_count = 0
+                next_cursor = None
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    playlist_info = ydl.extract_info(playlist_url, download=False)
+                try:
+                    playlist_info = playlist_lookup()
+                    
+                    playlist_videos = playlist_info['entries']
+                    playlist_title = playlist_info.get('title', 'Playlist')
+                    playlist_count = playlist_info.get('playlist_count') or len(playlist_videos)
+                    next_cursor = playlist_cursor(playlist_info, 0)
+                except Exception as e:
+                    record_error('info', e)
+                    print(f"Playlist extraction failed: {e}")
+                    # Continue with single video - playlist_videos stays empty
                 
-                entries = playlist_info.get('entries', [])
-                playlist_title = playlist_info.get('title', 'Playlist')
+                # Only show playlist options if we found videos
+                has_playlist = len(playlist_videos) > 1
                 
-                for entry in entries:
-                    if entry:
-                        playlist_videos.append({
-                            'id': entry.get('id', ''),
-                            'title': entry.get('title', 'Unknown'),
-                            'duration': entry.get('duration', 0)
-                        })
-            except Exception as e:
-                print(f"Playlist extraction failed: {e}")
-                # Continue with single video - playlist_videos stays empty
-            
-            # Get current video info
-            single_url = f'https://www.youtube.com/watch?v={video_id}' if video_id else url
-            ydl_opts_single = {'quiet': True, 'no_warnings': True}
-            with yt_dlp.YoutubeDL(ydl_opts_single) as ydl:
-                video_info = ydl.extract_info(single_url, download=False)
-            
-            video_qualities, audio_qualities = extract_qualities(video_info)
-            
-            # Only show playlist options if we found videos
-            has_playlist = len(playlist_videos) > 1
+                response.update({
+                    'is_playlist': has_playlist,
+                    'playlist_title': playlist_title if has_playlist else None,
+                    'playlist_count': playlist_count if has_playlist else 0,
+                    'playlist_videos': playlist_videos if has_playlist else [],
+                    'next_cursor': next_cursor if has_playlist else None
+                })
             
-            return jsonify({
-                'is_playlist': has_playlist,
-                'playlist_title': playlist_title if has_playlist else None,
-                'playlist_count': len(playlist_videos) if has_playlist else 0,
-                'playlist_videos': playlist_videos if has_playlist else [],
-                'playlist_id': playlist_id,
-                'current_video_id': video_id,
-                'title': video_info.get('title', 'Unknown'),
-                'channel': video_info.get('uploader', 'Unknown'),
-                'duration': video_info.get('duration', 0),
-                'thumbnail': video_info.get('thumbnail', ''),
-                'video_qualities': video_qualities,
-                'audio_qualities': audio_qualities
-            })
+            return jsonify(response)
         
         else:
             # Single video
-            ydl_opts = {'quiet': True, 'no_warnings': True}
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-            
-            video_qualities, audio_qualities = extract_qualities(info)
+            info = fetch_video_info(url, lite=lite)
+            if lite:
+                prefetch_full_info(url)
             
             return jsonify({
                 'is_playlist': False,
-                'title': info.get('title', 'Unknown'),
-                'channel': info.get('uploader', 'Unknown'),
-                'duration': info.get('duration', 0),
-                'thumbnail': info.get('thumbnail', ''),
-                'video_qualities': video_qualities,
-                'audio_qualities': audio_qualities
+                **video_summary(info)
             })
     
     except Exception as e:
+        record_error('info', e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/playlist/<playlist_id>', methods=['GET'])
+@require_awake
+def get_playlist_page(playlist_id):
+    """Get one page of playlist entries - requires AWAKE"""
+    update_activity()
+    cursor = request.args.get('cursor', '0')
+    
+    if not cursor.isdigit():
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    start = int(cursor)
+    try:
+        playlist_info = fetch_playlist_info(playlist_id, start=start)
+        return jsonify({
+            'playlist_id': playlist_id,
+            'playlist_title': playlist_info.get('title', 'Playlist'),
+            'playlist_count': playlist_info.get('playlist_count'),
+            'playlist_videos': playlist_info['entries'],
+            'next_cursor': playlist_cursor(playlist_info, start)
+        })
+    except Exception as e:
+        record_error('info', e)
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/info/batch', methods=['POST'])
+@require_awake
+def get_video_info_batch():
+    """Resolve many video URLs at once, streamed back as NDJSON - requires AWAKE"""
+    update_activity()
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('urls'), list):
+        return jsonify({'error': 'urls array is required'}), 400
+    
+    # Dedupe by video ID - URLs without one are keyed by themselves
+    groups = {}
+    for url in data['urls']:
+        if isinstance(url, str) and url:
+            groups.setdefault(extract_video_id(url) or url, []).append(url)
+    
+    if not groups:
+        return jsonify({'error': 'urls array is required'}), 400
+    if len(groups) > MAX_INFO_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_INFO_BATCH_SIZE} videos per batch'}), 400
+    
+    def resolve(urls):
+        video_id = extract_video_id(urls[0])
+        if video_id is None and is_playlist_url(urls[0]):
+            raise ValueError('Playlist URLs are not supported in batch requests')
+        url = f'https://www.youtube.com/watch?v={video_id}' if video_id else urls[0]
+        return video_summary(fetch_video_info(url))
+    
+    futures = {info_executor.submit(resolve, urls): urls for urls in groups.values()}
+    
+    def generate():
+        for future in as_completed(futures):
+            urls = futures[future]
+            result = {'video_id': extract_video_id(urls[0]), 'urls': urls}
+            try:
+                result.update(future.result())
+            except Exception as e:
+                record_error('info', e)
+                result['error'] = str(e)
+            update_activity()
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 def extract_qualities(info):
     """Extract video and audio qualities from info"""
     video_qualities = []
@@ -263,10 +912,26 @@ def extract_qualities(info):
         video_qualities = [{'format_id': 'bestvideo+bestaudio/best', 'height': 1080, 'label': 'Best Available'}]
     if not audio_qualities:
         audio_qualities = [{'format_id': 'bestaudio/best', 'abr': 320, 'label': 'Best Available'}]
+    # Opt-in, so the default stays an mp3
+    audio_qualities.append({'format_id': NATIVE_AUDIO, 'abr': audio_qualities[0]['abr'],
+                            'label': 'Original (no re-encode)'})
     
     return video_qualities, audio_qualities
 
 
+def video_summary(info):
+    """Popup-facing fields for a single video"""
+    video_qualities, audio_qualities = extract_qualities(info)
+    return {
+        'title': info.get('title', 'Unknown'),
+        'channel': info.get('uploader', 'Unknown'),
+        'duration': info.get('duration', 0),
+        'thumbnail': info.get('thumbnail', ''),
+        'video_qualities': video_qualities,
+        'audio_qualities': audio_qualities
+    }
+
+
 @app.route('/api/download', methods=['POST'])
 @require_awake
 def download_video():
@@ -285,24 +950,26 @@ def download_video():
     
     if not url:
         return jsonify({'error': 'URL is required'}), 400
+    if not isinstance(format_type, str) or not isinstance(quality, str):
+        return jsonify({'error': 'format and quality must be strings'}), 400
+    try:
+        priority = int(data.get('priority', 0))
+        concurrency = max(1, min(int(data.get('concurrency', PLAYLIST_CONCURRENCY)), MAX_PLAYLIST_CONCURRENCY))
+        engine = download_engine(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid download setting: {e}'}), 400
     
     task_id = str(uuid.uuid4())
+    job = {
+        'kind': 'single', 'format': format_type, 'quality': quality, 'cookies': cookies,
+        'priority': priority, 'engine': engine
+    }
     
     if download_playlist and is_playlist_url(url):
         # Playlist download
-        download_tasks[task_id] = {
-            'status': 'starting',
-            'progress': 0,
-            'current': 0,
-            'total': 0,
-            'current_title': '',
-            'playlist_title': '',
-            'filename': None,
-            'error': None,
-            'is_playlist': True,
-            'cancelled': False
-        }
-        thread = threading.Thread(target=playlist_download_worker, args=(task_id, url, format_type, quality, cookies))
+        download_tasks.create(task_id, is_playlist=True, engine=engine)
+        worker = functools.partial(playlist_download_worker, concurrency=concurrency)
+        job.update(kind='playlist', concurrency=concurrency)
     else:
         # Single video download
         # If it's a playlist URL but user wants single video, extract video ID
@@ -311,19 +978,120 @@ def download_video():
             if video_id:
                 url = f'https://www.youtube.com/watch?v={video_id}'
         
-        download_tasks[task_id] = {
-            'status': 'starting',
-            'progress': 0,
-            'filename': None,
-            'error': None,
-            'is_playlist': False
-        }
-        thread = threading.Thread(target=download_worker, args=(task_id, url, format_type, quality, cookies))
+        download_tasks.create(task_id, engine=engine)
+        worker = download_worker
+        
+        # Already on disk - finish instantly without touching the queue
+        existing = find_downloaded(extract_video_id(url), format_type, quality)
+        if existing:
+            update_task(task_id, status='completed', progress=100, queue_position=0,
+                        filename=os.path.basename(existing))
+            return jsonify({'success': True, 'task_id': task_id, 'queue_position': 0, 'reused': True})
     
-    thread.daemon = True
-    thread.start()
+    job['url'] = url
+    job_journal.submit(task_id, job)
+    try:
+        position = scheduler.submit(task_id, worker, (url, format_type, quality, cookies, engine), priority=priority)
+    except QueueFullError as e:
+        job_journal.discard(task_id)
+        download_tasks.remove(task_id)
+        response = jsonify({
+            'error': 'Download queue is full',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    update_task(task_id, queue_position=position)
+    return jsonify({'success': True, 'task_id': task_id, 'queue_position': position})
+
+
+@app.route('/api/download/batch', methods=['POST'])
+@require_awake
+def download_batch():
+    """Start one aggregate download for many videos - requires AWAKE"""
+    update_activity()
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'Request body is required'}), 400
+    
+    format_type = data.get('format', 'mp4')
+    quality = data.get('quality', 'best')
+    cookies = data.get('cookies', [])
+    if not isinstance(format_type, str) or not isinstance(quality, str):
+        return jsonify({'error': 'format and quality must be strings'}), 400
+    try:
+        priority = int(data.get('priority', 0))
+        engine = download_engine(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid download setting: {e}'}), 400
+    
+    # Accept bare video IDs and/or URLs, deduped by video ID
+    video_ids = data.get('video_ids') or []
+    if not isinstance(video_ids, list):
+        return jsonify({'error': 'video_ids must be a list'}), 400
+    invalid = [video_id for video_id in video_ids
+               if not isinstance(video_id, str) or not VIDEO_ID_PATTERN.fullmatch(video_id)]
+    if invalid:
+        return jsonify({'error': f'Invalid video IDs: {invalid[:10]}'}), 400
+    video_ids = video_ids + [extract_video_id(url) for url in data.get('urls') or [] if isinstance(url, str)]
+    video_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+    
+    if not video_ids:
+        return jsonify({'error': 'video_ids or urls is required'}), 400
+    if len(video_ids) > MAX_DOWNLOAD_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_DOWNLOAD_BATCH_SIZE} videos per batch'}), 400
+    
+    parent_id = str(uuid.uuid4())
+    child_ids = [str(uuid.uuid4()) for _ in video_ids]
+    download_tasks.create(parent_id, is_batch=True, children=child_ids, engine=engine)
+    for child_id in child_ids:
+        download_tasks.create(child_id, parent_id=parent_id, engine=engine)
+    
+    # Videos already on disk complete instantly; only the rest are queued
+    jobs = []
+    for child_id, video_id in zip(child_ids, video_ids):
+        existing = find_downloaded(video_id, format_type, quality)
+        if existing:
+            update_task(child_id, status='completed', progress=100, filename=os.path.basename(existing))
+        else:
+            jobs.append((child_id, download_worker,
+                         (f'https://www.youtube.com/watch?v={video_id}', format_type, quality, cookies, engine)))
+    if not jobs:
+        return jsonify({'success': True, 'task_id': parent_id, 'child_task_ids': child_ids})
+    
+    job_journal.submit(parent_id, {'kind': 'batch', 'priority': priority, 'engine': engine, 'children': child_ids})
+    for child_id, _, (url, *_) in jobs:
+        job_journal.submit(child_id, {
+            'kind': 'single', 'url': url, 'format': format_type, 'quality': quality,
+            'cookies': cookies, 'priority': priority, 'engine': engine, 'parent_id': parent_id
+        })
+    try:
+        positions = scheduler.submit_many(jobs, priority=priority)
+    except QueueFullError as e:
+        for child_id, _, _ in jobs:
+            job_journal.discard(child_id)
+        download_tasks.remove(parent_id)
+        response = jsonify({
+            'error': 'Download queue is full',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    for (child_id, _, _), position in zip(jobs, positions):
+        update_task(child_id, queue_position=position)
     
-    return jsonify({'success': True, 'task_id': task_id})
+    return jsonify({'success': True, 'task_id': parent_id, 'child_task_ids': child_ids})
+
+
+def task_progress(task_id):
+    """Progress snapshot of a task with its live queue position, or None"""
+    task = download_tasks.snapshot(task_id)
+    if task is not None and task['status'] == 'queued':
+        task['queue_position'] = scheduler.position(task_id)
+    return task
 
 
 @app.route('/api/progress/<task_id>', methods=['GET'])
@@ -331,9 +1099,42 @@ def download_video():
 def get_progress(task_id):
     """Get download progress - requires AWAKE"""
     update_activity()
+    task = task_progress(task_id)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(task)
+
+
+@app.route('/api/progress/<task_id>/stream', methods=['GET'])
+@require_awake
+def stream_progress(task_id):
+    """Stream download progress as Server-Sent Events - requires AWAKE"""
+    update_activity()
     if task_id not in download_tasks:
         return jsonify({'error': 'Task not found'}), 404
-    return jsonify(download_tasks[task_id])
+    
+    def generate():
+        min_interval = 1.0 / SSE_MAX_UPDATES_PER_SECOND
+        last_version = None
+        while True:
+            version = task_events.wait(task_id, last_version, timeout=SSE_KEEPALIVE_SECONDS)
+            if version == last_version:
+                yield ': keepalive\n\n'
+                continue
+            last_version = version
+            
+            task = task_progress(task_id)
+            if task is None:
+                return
+            yield f'data: {json.dumps(task)}\n\n'
+            if task['status'] in TERMINAL_STATUSES:
+                return
+            time.sleep(min_interval)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 @app.route('/api/cancel/<task_id>', methods=['POST'])
@@ -344,8 +1145,13 @@ def cancel_download(task_id):
     if task_id not in download_tasks:
         return jsonify({'error': 'Task not found'}), 404
     
-    download_tasks[task_id]['cancelled'] = True
-    download_tasks[task_id]['status'] = 'cancelled'
+    task = download_tasks.get(task_id)
+    update_task(task_id, cancelled=True)
+    for child_id in task.children:
+        scheduler.cancel(child_id)
+        update_task(child_id, cancelled=True, status='cancelled')
+    scheduler.cancel(task_id)
+    update_task(task_id, status='cancelled')
     return jsonify({'success': True, 'message': 'Download cancelled'})
 
 
@@ -353,37 +1159,216 @@ def cancel_download(task_id):
 # Helper Functions
 # =============================================================================
 
-def create_cookie_file(cookies):
-    """Create a Netscape-formatted cookie file from list of cookies"""
-    if not cookies:
+def video_selector(quality):
+    """yt-dlp format selector for an mp4 quality from the popup"""
+    return quality if quality != 'best' else BEST_VIDEO_SELECTOR
+
+
+def audio_bitrate(quality):
+    """mp3 bitrate in kbps for an audio quality - the selected abr, capped at MP3_BITRATE"""
+    match = AUDIO_BITRATE_CAP.search(quality or '')
+    return min(int(match.group(1)), MP3_BITRATE) if match else MP3_BITRATE
+
+
+def audio_selector(quality):
+    """yt-dlp format selector for an audio quality"""
+    match = AUDIO_BITRATE_CAP.search(quality or '')
+    return f'bestaudio[abr<={match.group(1)}]/bestaudio/best' if match else 'bestaudio/best'
+
+
+def find_downloaded(video_id, format_type, quality):
+    """Path of an already-downloaded file that satisfies this request, or None"""
+    if format_type == 'mp3' and quality == NATIVE_AUDIO:
+        return media_index.find_native_audio(video_id)
+    if format_type == 'mp3':
+        return media_index.find_audio(video_id, audio_bitrate(quality))
+    return media_index.find_video(video_id, video_selector(quality))
+
+
+def index_download(video_id, format_type, quality, info, filename):
+    """Record a finished download in the media index"""
+    if format_type == 'mp3' and quality == NATIVE_AUDIO:
+        media_index.add(video_id, 'audio', NATIVE_AUDIO, filename, abr=int(info.get('abr') or 0) or None)
+    elif format_type == 'mp3':
+        abr = audio_bitrate(quality)
+        media_index.add(video_id, 'mp3', f'{abr}k', filename, abr=abr)
+    else:
+        media_index.add(video_id, 'mp4', video_selector(quality), filename,
+                        height=info.get('height'), abr=int(info.get('abr') or 0) or None)
+
+
+def local_audio_source(video_id, format_type, quality):
+    """Local file an mp3 request can be transcoded from instead of fetched, or None"""
+    if format_type != 'mp3' or quality == NATIVE_AUDIO or not FFMPEG_PATH:
         return None
-        
+    return media_index.audio_source(video_id, audio_bitrate(quality),
+                                    best=not AUDIO_BITRATE_CAP.search(quality or ''))
+
+
+def transcode_local_media(task_id, video_id, source, job_args):
+    """Processing stage for an mp3 made from a local file of the same video.
+
+    If ffmpeg fails the job goes back to the scheduler (ahead of the queue
+    limit, it was admitted once) and downloads instead.
+    """
+    from yt_dlp.utils import DownloadCancelled
+    
+    abr = audio_bitrate(job_args[2])
     try:
-        fd, path = tempfile.mkstemp(suffix='.txt', text=True)
-        with os.fdopen(fd, 'w') as f:
-            f.write("# Netscape HTTP Cookie File\n")
-            f.write("# This file was generated by Tatarus YT Downloader\n\n")
-            
-            for cookie in cookies:
-                # Netscape format: domain flag path secure expiration name value
-                domain = cookie.get('domain', '')
-                # Ensure domain starts with . if it's a domain cookie
-                if not domain.startswith('.') and domain.startswith('www.'):
-                    domain = '.' + domain[4:]
-                
-                flag = 'TRUE' if domain.startswith('.') else 'FALSE'
-                path = cookie.get('path', '/')
-                secure = 'TRUE' if cookie.get('secure') else 'FALSE'
-                expiration = str(int(cookie.get('expirationDate', time.time() + 3600)))
-                name = cookie.get('name', '')
-                value = cookie.get('value', '')
-                
-                f.write(f"{domain}\t{flag}\t{path}\t{secure}\t{expiration}\t{name}\t{value}\n")
-        
-        return path
+        with processing_seconds.time():
+            filename = transcode_audio(task_id, source, abr)
+    except DownloadCancelled:
+        update_task(task_id, status='cancelled')
+        return
     except Exception as e:
-        print(f"Error creating cookie file: {e}")
-        return None
+        record_error('transcode', e)
+        print(f"Transcode from {source} failed, downloading instead: {e}")
+        worker = functools.partial(download_worker, reuse_local=False)
+        position, = scheduler.submit_many([(task_id, worker, job_args)], force=True)
+        update_task(task_id, status='queued', queue_position=position)
+        return
+    media_index.add(video_id, 'mp3', f'{abr}k', filename, abr=abr)
+    update_task(task_id, status='completed', progress=100, filename=os.path.basename(filename))
+
+
+def transcode_audio(task_id, source, abr):
+    """Transcode the audio track of a local file to an `abr` kbps mp3 with ffmpeg"""
+    from yt_dlp.utils import DownloadCancelled
+    
+    stem, ext = os.path.splitext(source)
+    target = stem + '.mp3'
+    if ext == '.mp3' or os.path.exists(target):
+        target = f'{stem} ({abr}k).mp3'
+    update_task(task_id, status='processing')
+    
+    partial = target + '.part'
+    timer = CpuTimer()
+    try:
+        with timer:
+            process = subprocess.Popen(
+                [FFMPEG_PATH, '-y', '-loglevel', 'error', '-i', source, '-vn',
+                 '-codec:a', 'libmp3lame', '-b:a', f'{abr}k', '-f', 'mp3', partial],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            with process.stderr:
+                while process.poll() is None:
+                    if download_tasks.is_cancelled(task_id):
+                        process.kill()
+                        process.wait()
+                        raise DownloadCancelled()
+                    time.sleep(0.25)
+                if process.returncode != 0:
+                    raise RuntimeError(process.stderr.read().decode(errors='replace').strip() or f'ffmpeg exited with {process.returncode}')
+        os.replace(partial, target)
+        return target
+    finally:
+        update_task(task_id, cpu_seconds=timer.seconds)
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def bandwidth_weight(value):
+    """A job's share of the bandwidth limit, clamped to server limits - raises ValueError if not positive"""
+    weight = engine_number(value, 'bandwidth_weight', float)
+    if not weight > 0:
+        raise ValueError(f'Bandwidth weight must be positive: {value}')
+    return max(MIN_BANDWIDTH_WEIGHT, min(weight, MAX_BANDWIDTH_WEIGHT))
+
+
+def engine_number(value, name, convert=int):
+    """`convert(value)`, raising ValueError (never TypeError) for anything that is not a number"""
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number: {value!r}') from None
+
+
+def download_engine(data):
+    """Fragment, chunk, external downloader and bandwidth settings for a job, clamped to server limits.
+
+    Missing or null settings take the server default. Raises ValueError for
+    bad numbers or an external downloader that is not allowed or not installed.
+    """
+    def setting(name, default):
+        value = data.get(name)
+        return default if value is None else value
+    
+    fragments = engine_number(setting('concurrent_fragments', CONCURRENT_FRAGMENTS), 'concurrent_fragments')
+    chunk_size = engine_number(setting('chunk_size', HTTP_CHUNK_SIZE), 'chunk_size')
+    external = data.get('external_downloader', EXTERNAL_DOWNLOADER) or None
+    if external and (external not in ALLOWED_EXTERNAL_DOWNLOADERS or not shutil.which(external)):
+        raise ValueError(f'External downloader not available: {external}')
+    return {
+        'concurrent_fragments': max(1, min(fragments, MAX_CONCURRENT_FRAGMENTS)),
+        'chunk_size': max(0, min(chunk_size, MAX_HTTP_CHUNK_SIZE)),
+        'external_downloader': external,
+        'bandwidth_weight': bandwidth_weight(setting('bandwidth_weight', 1.0))
+    }
+
+
+def engine_params(engine):
+    """Per-checkout YoutubeDL params for a download engine dict (server defaults if None)"""
+    engine = engine or download_engine({})
+    fragments = engine['concurrent_fragments']
+    params = {
+        'concurrent_fragment_downloads': fragments,
+        'http_chunk_size': engine['chunk_size'] or None
+    }
+    if bandwidth.rate:
+        params.update(buffersize=BANDWIDTH_BLOCK_SIZE, noresizebuffer=True)
+    external = engine['external_downloader']
+    if external:
+        # External downloaders report progress too rarely to be shaped - aria2c
+        # at least gets the global limit as a ceiling
+        params['external_downloader'] = {'default': external}
+        if external == 'aria2c':
+            aria2c_args = ['-x', str(fragments), '-s', str(fragments), '-k', '1M']
+            if bandwidth.rate:
+                aria2c_args += ['--max-download-limit', str(bandwidth.rate)]
+            params['external_downloader_args'] = {'aria2c': aria2c_args}
+    return params
+
+
+def download_options(format_type, quality, cookie_file=None):
+    """YoutubeDL pool profile and options for a download job.
+
+    Progress hooks are per job, so they are passed to `ydl_pool.checkout`
+    instead of being part of the options.
+    """
+    if format_type == 'mp3' and quality == NATIVE_AUDIO:
+        # 'best' keeps the source codec - ffmpeg stream-copies it into an m4a/opus container
+        profile = f'audio:{NATIVE_AUDIO}'
+        ydl_opts = {
+            'format': 'bestaudio/best',
+            'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
+            'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'best'}],
+            'continuedl': True,
+            'quiet': True,
+        }
+    elif format_type == 'mp3':
+        abr = audio_bitrate(quality)
+        profile = f'mp3:{abr}'
+        ydl_opts = {
+            'format': audio_selector(quality),
+            'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
+            'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': str(abr)}],
+            'continuedl': True,
+            'quiet': True,
+        }
+    else:
+        video_format = video_selector(quality)
+        profile = f'mp4:{video_format}'
+        ydl_opts = {
+            'format': video_format,
+            'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
+            'merge_output_format': 'mp4',
+            'continuedl': True,
+            'quiet': True,
+        }
+    
+    if cookie_file:
+        ydl_opts['cookiefile'] = cookie_file
+    return profile, ydl_opts
 
 
 def get_quality_label(height):
@@ -397,161 +1382,494 @@ def get_audio_quality_label(abr):
     return labels.get(int(abr) if abr else 128, f'{int(abr)} kbps')
 
 
+class ProgressThrottle:
+    """Coalesce progress hook calls - publish every PROGRESS_MIN_INTERVAL seconds or PROGRESS_MIN_STEP percent"""
+
+    __slots__ = ('last_time', 'last_progress')
+
+    def __init__(self):
+        self.last_time = 0.0
+        self.last_progress = None
+
+    def ready(self, progress=None):
+        now = time.monotonic()
+        if (now - self.last_time >= PROGRESS_MIN_INTERVAL
+                or (progress is not None and self.last_progress is not None
+                    and progress - self.last_progress >= PROGRESS_MIN_STEP)):
+            self.last_time = now
+            self.last_progress = progress
+            return True
+        return False
+
+
 def progress_hook(task_id):
+    from yt_dlp.utils import DownloadCancelled
+    
+    throttle = ProgressThrottle()
+    file_bytes = {}  # filename -> (downloaded, total) - video and audio streams are separate files
+    cancelled = functools.partial(download_tasks.is_cancelled, task_id)
+    
     def hook(d):
-        update_activity()
+        if cancelled():
+            raise DownloadCancelled()
         if d['status'] == 'downloading':
-            total = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
-            downloaded = d.get('downloaded_bytes', 0)
+            bandwidth.transferred(task_id, d.get('filename'), d.get('downloaded_bytes', 0), cancelled)
+            if profiler.profiling(task_id):
+                profiler.end(task_id, 'extract')
+                profiler.begin(task_id, f"download {os.path.basename(d.get('filename') or '')}")
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
             if total > 0:
-                download_tasks[task_id]['progress'] = (downloaded / total) * 100
-                download_tasks[task_id]['status'] = 'downloading'
+                downloaded = d.get('downloaded_bytes', 0)
+                file_bytes[d.get('filename')] = (downloaded, total)
+                progress = (downloaded / total) * 100
+                if throttle.ready(progress):
+                    update_activity()
+                    update_task(task_id, progress=progress, status='downloading',
+                                speed=d.get('speed'), eta=d.get('eta'),
+                                downloaded_bytes=sum(done for done, _ in file_bytes.values()),
+                                total_bytes=sum(size for _, size in file_bytes.values()))
         elif d['status'] == 'finished':
-            download_tasks[task_id]['progress'] = 100
-            download_tasks[task_id]['status'] = 'processing'
+            download_bytes.observe(d.get('total_bytes') or d.get('downloaded_bytes') or 0)
+            profiler.end(task_id, f"download {os.path.basename(d.get('filename') or '')}")
+            update_activity()
+            update_task(task_id, progress=100, status='processing', speed=None, eta=None,
+                        downloaded_bytes=sum(size for _, size in file_bytes.values()),
+                        total_bytes=sum(size for _, size in file_bytes.values()))
     return hook
 
 
-def download_worker(task_id, url, format_type, quality, cookies=None):
-    """Worker for single video download"""
-    cookie_file = create_cookie_file(cookies)
-    try:
-        if format_type == 'mp3':
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
-                'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '320'}],
-                'progress_hooks': [progress_hook(task_id)],
-                'quiet': True,
-            }
+class PlaylistProgress:
+    """Aggregate byte-weighted progress across parallel playlist entries.
+
+    Only in-flight entries are tracked individually; finished entries are
+    folded into running totals so memory stays flat for long playlists.
+    `total` may grow while the playlist is still being enumerated.
+    """
+
+    def __init__(self, task_id, total=0):
+        self.task_id = task_id
+        self.total = total
+        self.finished = 0
+        self.completed = 0
+        self.finished_bytes = 0
+        self.finished_sized = 0
+        self.entry_bytes = {}  # entry key -> {filename: [downloaded, total]}
+        self.entry_speed = {}  # entry key -> bytes/sec
+        self.active = {}  # entry key -> title
+        self.cpu_seconds = 0.0
+        self.throttle = ProgressThrottle()
+        self.lock = threading.Lock()
+
+    def discovered(self, count):
+        """Raise the expected entry count as enumeration finds more entries"""
+        with self.lock:
+            if count > self.total:
+                self.total = count
+                update_task(self.task_id, total=count)
+
+    def start(self, key, title):
+        with self.lock:
+            self.active[key] = title
+            self._publish()
+
+    def finish(self, key, completed):
+        with self.lock:
+            self.active.pop(key, None)
+            self.entry_speed.pop(key, None)
+            self.finished += 1
+            self.completed += 1 if completed else 0
+            files = self.entry_bytes.pop(key, None)
+            if files:
+                self.finished_bytes += sum(size for _, size in files.values())
+                self.finished_sized += 1
+            self._publish()
+
+    def processed(self, cpu_seconds):
+        """Add an entry's post-processing CPU time to the playlist total"""
+        with self.lock:
+            self.cpu_seconds += cpu_seconds or 0
+            update_task(self.task_id, cpu_seconds=round(self.cpu_seconds, 3))
+
+    def hook(self, key):
+        from yt_dlp.utils import DownloadCancelled
+        
+        cancelled = functools.partial(download_tasks.is_cancelled, self.task_id)
+        
+        def hook(d):
+            if cancelled():
+                raise DownloadCancelled()
+            if d['status'] == 'downloading':
+                bandwidth.transferred(self.task_id, (key, d.get('filename')), d.get('downloaded_bytes', 0), cancelled)
+                if profiler.profiling(self.task_id):
+                    profiler.end(self.task_id, f'extract #{key}')
+                    profiler.begin(self.task_id, f"download #{key} {os.path.basename(d.get('filename') or '')}")
+                total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+                downloaded = d.get('downloaded_bytes', 0)
+                if total > 0:
+                    with self.lock:
+                        files = self.entry_bytes.setdefault(key, {})
+                        files[d.get('filename')] = [downloaded, total]
+                        self.entry_speed[key] = d.get('speed') or 0
+                        if self.throttle.ready():
+                            update_activity()
+                            self._publish()
+            elif d['status'] == 'finished':
+                download_bytes.observe(d.get('total_bytes') or d.get('downloaded_bytes') or 0)
+                profiler.end(self.task_id, f"download #{key} {os.path.basename(d.get('filename') or '')}")
+        return hook
+
+    def _publish(self):
+        downloaded = self.finished_bytes
+        known_total = self.finished_bytes
+        for files in self.entry_bytes.values():
+            for done, size in files.values():
+                downloaded += done
+                known_total += size
+        
+        # Entries without byte counts yet are weighted by the average known size
+        sized = self.finished_sized + len(self.entry_bytes)
+        unsized = max(0, self.total - self.finished - len(self.entry_bytes))
+        estimated_total = 0
+        if sized:
+            estimated_total = known_total + unsized * (known_total / sized)
+            progress = (downloaded / estimated_total) * 100 if estimated_total else 0
         else:
-            ydl_opts = {
-                'format': quality if quality != 'best' else 'bestvideo+bestaudio/best',
-                'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
-                'merge_output_format': 'mp4',
-                'progress_hooks': [progress_hook(task_id)],
-                'quiet': True,
-            }
+            progress = (self.finished / self.total) * 100 if self.total else 0
         
-        if cookie_file:
-            ydl_opts['cookiefile'] = cookie_file
+        speed = sum(self.entry_speed.values())
+        fields = {
+            'progress': min(progress, 100),
+            'speed': speed or None,
+            'eta': int((estimated_total - downloaded) / speed) if speed and estimated_total else None,
+            'current': min(self.finished + len(self.active), self.total),
+            'active_titles': list(self.active.values())
+        }
+        if self.active:
+            fields['current_title'] = list(self.active.values())[-1]
+        update_task(self.task_id, **fields)
+
+
+def downloaded_filename(ydl, info, format_type, quality=None):
+    """Final path of a processed download"""
+    if info.get('filepath'):
+        return info['filepath']
+    filename = ydl.prepare_filename(info)
+    if format_type == 'mp3' and quality != NATIVE_AUDIO:
+        return os.path.splitext(filename)[0] + '.mp3'
+    return filename
+
+
+@profiled
+def post_process_download(task_id, deferred, info, on_done, checkout, show_progress=True):
+    """Processing stage - run a download's deferred post-processing.
+
+    The fetch gave its ydl back to the pool; `checkout()` takes one of the
+    same profile again for the postprocessors. Calls on_done(info, error,
+    cpu_seconds) with the processed info dict, or with the exception that
+    stopped processing, then frees the fetch's `processing_slots` slot.
+    """
+    from yt_dlp.utils import DownloadCancelled
+    
+    step_started = None
+    
+    def on_step(done, total, name):
+        nonlocal step_started
+        if show_progress:
+            update_task(task_id, processing_progress=(done / total) * 100)
+        now = time.time()
+        profiler.record(task_id, name, step_started, now)
+        step_started = now
+    
+    error = None
+    timer = CpuTimer()
+    try:
+        with timer, processing_seconds.time():
+            if deferred:
+                with checkout() as ydl:
+                    for filename, deferred_info, files_to_move in deferred:
+                        if show_progress:
+                            update_task(task_id, status='processing', processing_progress=0)
+                        step_started = time.time()
+                        info = ydl.run_deferred(filename, deferred_info, files_to_move, on_step,
+                                                lambda: download_tasks.is_cancelled(task_id))
+    except Exception as e:
+        if not isinstance(e, DownloadCancelled):
+            record_error('processing', e)
+        error = e
+    try:
+        on_done(info, error, timer.seconds)
+    finally:
+        processing_slots.release()
+
+
+@profiled
+def download_worker(task_id, url, format_type, quality, cookies=None, engine=None, reuse_local=True):
+    """Worker for single video download - the fetch stage.
+
+    Post-processing is handed to `processing_pool` and the ydl goes back to
+    the pool, so this download slot frees up as soon as the bytes are in. The
+    fetch only starts once `processing_slots` has room for its hand-off. An
+    mp3 that can be transcoded from a local file goes to `processing_pool` too.
+    """
+    from yt_dlp.utils import DownloadCancelled
+    
+    if download_tasks.is_cancelled(task_id):
+        return
+    update_task(task_id, status='starting', queue_position=0)
+    observe_queue_wait(task_id)
+    started = time.time()
+    bandwidth.register(task_id, (engine or {}).get('bandwidth_weight', 1.0))
+    cookie_file, cookie_id = cookie_files.acquire(cookies)
+    try:
+        video_id = extract_video_id(url)
+        filename = find_downloaded(video_id, format_type, quality)
+        if filename:
+            update_task(task_id, status='completed', progress=100, filename=os.path.basename(filename))
+            return
+        source = local_audio_source(video_id, format_type, quality) if reuse_local else None
+        if source:
+            processing_pool.submit(transcode_local_media, task_id, video_id, source,
+                                   (url, format_type, quality, cookies, engine))
+            return
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info)
-            if format_type == 'mp3':
-                filename = os.path.splitext(filename)[0] + '.mp3'
+        profile, ydl_opts = download_options(format_type, quality, cookie_file)
+        processing_slots.acquire()
+        handed_off = False
+        try:
+            with download_slots, ydl_pool.checkout(
+                profile, ydl_opts, cookie_id=cookie_id, progress_hooks=[progress_hook(task_id)],
+                defer_post_process=True, **engine_params(engine)
+            ) as ydl:
+                # Cancelled while waiting for a slot
+                if download_tasks.is_cancelled(task_id):
+                    return
+                profiler.begin(task_id, 'extract')
+                info = download_with_cache(ydl, url)
+                profiler.end(task_id, 'extract')
+                deferred = ydl.take_deferred()
+            task = download_tasks.get(task_id)
+            elapsed = time.time() - started
+            download_seconds.observe(elapsed, 'single')
+            avg_speed = task.downloaded_bytes / elapsed if task and elapsed > 0 else None
+            
+            def on_done(info, error, cpu_seconds):
+                if isinstance(error, DownloadCancelled):
+                    update_task(task_id, status='cancelled', processing_progress=None, cpu_seconds=cpu_seconds)
+                elif error is not None:
+                    update_task(task_id, status='error', processing_progress=None, cpu_seconds=cpu_seconds,
+                                error=str(error))
+                else:
+                    filename = downloaded_filename(ydl, info, format_type, quality)
+                    index_download(video_id, format_type, quality, info, filename)
+                    update_task(task_id, status='completed', progress=100, processing_progress=None,
+                                avg_speed=avg_speed, cpu_seconds=cpu_seconds, filename=os.path.basename(filename))
             
-            download_tasks[task_id]['status'] = 'completed'
-            download_tasks[task_id]['progress'] = 100
-            download_tasks[task_id]['filename'] = os.path.basename(filename)
+            processing_pool.submit(post_process_download, task_id, deferred, info, on_done,
+                                   functools.partial(ydl_pool.checkout, profile, ydl_opts, cookie_id=cookie_id))
+            handed_off = True
+        finally:
+            if not handed_off:
+                processing_slots.release()
     
+    except DownloadCancelled:
+        update_task(task_id, status='cancelled')
     except Exception as e:
-        download_tasks[task_id]['status'] = 'error'
-        download_tasks[task_id]['error'] = str(e)
+        record_error('download', e)
+        update_task(task_id, status='error', error=str(e))
     finally:
-        if cookie_file and os.path.exists(cookie_file):
-            try:
-                os.remove(cookie_file)
-            except:
-                pass
+        bandwidth.release(task_id)
+        cookie_files.release(cookie_file)
+
 
+@profiled
+def playlist_download_worker(task_id, url, format_type, quality, cookies=None, engine=None,
+                             concurrency=PLAYLIST_CONCURRENCY, skip_ids=()):
+    """Worker for playlist download - fetches up to `concurrency` entries at once.
 
-def playlist_download_worker(task_id, url, format_type, quality, cookies=None):
-    """Worker for playlist download"""
-    cookie_file = create_cookie_file(cookies)
+    Entries draw from the same `download_slots` as every other download,
+    so `concurrency` only caps this job's share of them. Each entry's post-processing runs on `processing_pool` while the next
+    entry downloads. Entries in `skip_ids` were finished before a restart
+    and count as completed.
+    """
+    from yt_dlp.utils import DownloadCancelled
+    
+    if download_tasks.is_cancelled(task_id):
+        return
+    update_task(task_id, status='starting', queue_position=0)
+    observe_queue_wait(task_id)
+    started = time.time()
+    bandwidth.register(task_id, (engine or {}).get('bandwidth_weight', 1.0))
+    cookie_file, cookie_id = cookie_files.acquire(cookies)
     try:
-        # Extract playlist ID and create proper playlist URL
         playlist_id = extract_playlist_id(url)
         playlist_url = f'https://www.youtube.com/playlist?list={playlist_id}'
         
-        # Get playlist info
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': 'in_playlist',
-            'playlistend': 50
-        }
-
+        profile, entry_opts = download_options(format_type, quality, cookie_file)
+        ydl_opts = dict(PLAYLIST_OPTIONS)
         if cookie_file:
             ydl_opts['cookiefile'] = cookie_file
-
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            playlist_info = ydl.extract_info(playlist_url, download=False)
-        
-        entries = playlist_info.get('entries', [])
-        total = len(entries)
-        download_tasks[task_id]['total'] = total
-        download_tasks[task_id]['playlist_title'] = playlist_info.get('title', 'Playlist')
         
-        completed_files = []
-        
-        for i, entry in enumerate(entries):
-            # Check if cancelled
-            if download_tasks[task_id].get('cancelled'):
-                download_tasks[task_id]['status'] = 'cancelled'
-                download_tasks[task_id]['filename'] = f'{len(completed_files)} files downloaded (cancelled)'
-                return
+        # Enumerate lazily - process=False keeps `entries` a generator, so the
+        # first downloads start while later pages are still being fetched.
+        # The generator pages through this ydl, so it stays checked out.
+        with ydl_pool.checkout('playlist', ydl_opts, cookie_id=cookie_id) as ydl:
+            with extract_seconds.time('playlist'), profiler.span('extract playlist', task_id):
+                playlist_info = ydl.extract_info(playlist_url, download=False, process=False)
+                if playlist_info.get('_type') in ('url', 'url_transparent'):
+                    playlist_info = ydl.extract_info(playlist_info['url'], download=False, process=False)
             
-            if not entry:
-                continue
-            
-            video_id = entry.get('id', '')
-            video_url = f'https://www.youtube.com/watch?v={video_id}'
-            
-            download_tasks[task_id]['current'] = i + 1
-            download_tasks[task_id]['current_title'] = entry.get('title', 'Unknown')[:40]
-            download_tasks[task_id]['status'] = 'downloading'
-            download_tasks[task_id]['progress'] = ((i) / total) * 100
+            expected = min(playlist_info.get('playlist_count') or 0, MAX_PLAYLIST_ENTRIES)
+            update_task(task_id, total=expected, playlist_title=playlist_info.get('title', 'Playlist'), status='downloading')
+            progress = PlaylistProgress(task_id, expected)
+            processing = []
+            entry_checkout = functools.partial(ydl_pool.checkout, profile, entry_opts, cookie_id=cookie_id)
             
-            try:
-                if format_type == 'mp3':
-                    ydl_opts = {
-                        'format': 'bestaudio/best',
-                        'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
-                        'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '320'}],
-                        'quiet': True,
-                    }
-                else:
-                    ydl_opts = {
-                        'format': quality if quality != 'best' else 'bestvideo+bestaudio/best',
-                        'outtmpl': os.path.join(DOWNLOAD_FOLDER, '%(title)s.%(ext)s'),
-                        'merge_output_format': 'mp4',
-                        'quiet': True,
-                    }
+            def download_entry(index, entry):
+                video_id = entry.get('id', '')
+                video_url = f'https://www.youtube.com/watch?v={video_id}'
+                title = (entry.get('title') or 'Unknown')[:40]
+                progress.start(index, title)
+                handed_off = processed = False
                 
-                if cookie_file:
-                    ydl_opts['cookiefile'] = cookie_file
+                def on_done(info, error, cpu_seconds):
+                    if error is None:
+                        index_download(video_id, format_type, quality, info,
+                                       downloaded_filename(entry_ydl, info, format_type, quality))
+                        job_journal.entry_done(task_id, video_id)
+                    elif not isinstance(error, DownloadCancelled):
+                        print(f"Error processing {video_id}: {error}")
+                    progress.processed(cpu_seconds)
+                    progress.finish(index, error is None)
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=True)
-                    completed_files.append(info.get('title', 'Unknown'))
+                try:
+                    if find_downloaded(video_id, format_type, quality):
+                        job_journal.entry_done(task_id, video_id)
+                        progress.finish(index, True)
+                        handed_off = True
+                        return
+                    with download_slots, ydl_pool.checkout(
+                        profile, entry_opts, cookie_id=cookie_id, progress_hooks=[progress.hook(index)],
+                        defer_post_process=True, **engine_params(engine)
+                    ) as entry_ydl:
+                        if download_tasks.is_cancelled(task_id):
+                            return
+                        entry_started = time.time()
+                        profiler.begin(task_id, f'extract #{index}')
+                        info = download_with_cache(entry_ydl, video_url)
+                        profiler.end(task_id, f'extract #{index}')
+                        download_seconds.observe(time.time() - entry_started, 'playlist_entry')
+                        deferred = entry_ydl.take_deferred()
+                    processing.append(processing_pool.submit(
+                        post_process_download, task_id, deferred, info, on_done, entry_checkout, False
+                    ))
+                    handed_off = processed = True
+                
+                except DownloadCancelled:
+                    pass
+                except Exception as e:
+                    record_error('download', e)
+                    print(f"Error downloading {video_id}: {e}")
+                finally:
+                    if not handed_off:
+                        progress.finish(index, False)
+                    if not processed:
+                        processing_slots.release()
+                    slots.release()
             
-            except Exception as e:
-                print(f"Error downloading {video_id}: {e}")
-                continue
+            # A semaphore bounds in-flight entries so enumeration only runs ahead by `concurrency`;
+            # their downloads still wait for a global download slot
+            slots = threading.Semaphore(concurrency)
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                count = 0
+                for entry in itertools.islice(playlist_info.get('entries') or [], MAX_PLAYLIST_ENTRIES):
+                    if download_tasks.is_cancelled(task_id):
+                        break
+                    if not entry or not entry.get('id'):
+                        continue
+                    count += 1
+                    progress.discovered(count)
+                    if entry['id'] in skip_ids:
+                        progress.finish(count, True)
+                        continue
+                    slots.acquire()
+                    processing_slots.acquire()
+                    pool.submit(profiler.bound(task_id, download_entry), count, entry)
+            wait(processing)
         
-        download_tasks[task_id]['status'] = 'completed'
-        download_tasks[task_id]['progress'] = 100
-        download_tasks[task_id]['filename'] = f'{len(completed_files)} files downloaded'
+        if download_tasks.is_cancelled(task_id):
+            update_task(task_id, status='cancelled', filename=f'{progress.completed} files downloaded (cancelled)')
+            return
+        
+        download_seconds.observe(time.time() - started, 'playlist')
+        update_task(task_id, status='completed', progress=100, total=count, filename=f'{progress.completed} files downloaded')
     
     except Exception as e:
-        download_tasks[task_id]['status'] = 'error'
-        download_tasks[task_id]['error'] = str(e)
+        record_error('playlist', e)
+        update_task(task_id, status='error', error=str(e))
     finally:
-        if cookie_file and os.path.exists(cookie_file):
-            try:
-                os.remove(cookie_file)
-            except:
-                pass
+        bandwidth.release(task_id)
+        cookie_files.release(cookie_file)
+
+
+def resume_jobs():
+    """Re-queue jobs the journal recorded as unfinished before the last shutdown.
+
+    Tasks keep their IDs. Partial .part files are continued by yt-dlp
+    (continuedl) and playlist entries that already finished are skipped.
+    Batch children that finished before the restart are restored with
+    their final status so the batch counts stay right; children missing
+    from the journal were already on disk when the batch was submitted.
+    """
+    pending = job_journal.pending()
+    batches = {task_id: job for task_id, job, _, _ in pending if job['kind'] == 'batch'}
+    resumed_children = {}
+    for task_id, job, _, _ in pending:
+        if job.get('parent_id') in batches:
+            resumed_children.setdefault(job['parent_id'], []).append(task_id)
+    
+    groups = {}
+    for task_id, job, _, done_entries in pending:
+        if job['kind'] == 'batch':
+            live = resumed_children.get(task_id, [])
+            child_ids = job.get('children') or live
+            finished = dict(done_entries)
+            download_tasks.create(task_id, is_batch=True, children=child_ids, engine=job.get('engine'))
+            for child_id in child_ids:
+                if child_id not in live:
+                    status = finished.get(child_id, 'completed')
+                    download_tasks.create(child_id, parent_id=task_id, engine=job.get('engine'), status=status,
+                                          progress=100 if status == 'completed' else 0)
+            continue
+        if job['kind'] == 'playlist':
+            download_tasks.create(task_id, is_playlist=True, engine=job.get('engine'))
+            worker = functools.partial(playlist_download_worker, concurrency=job['concurrency'],
+                                       skip_ids=frozenset(done_entries))
+        else:
+            download_tasks.create(task_id, parent_id=job.get('parent_id'), engine=job.get('engine'))
+            worker = download_worker
+        args = (job['url'], job['format'], job['quality'], job.get('cookies'), job.get('engine'))
+        priority = job.get('priority', batches.get(job.get('parent_id'), {}).get('priority', 0))
+        groups.setdefault(priority, []).append((task_id, worker, args))
+    for parent_id in batches:
+        refresh_batch(parent_id)
+    
+    # These jobs were admitted before the restart, so they bypass the queue limit
+    resumed = 0
+    for priority, jobs in sorted(groups.items()):
+        positions = scheduler.submit_many(jobs, priority=priority, force=True)
+        for (task_id, _, _), position in zip(jobs, positions):
+            update_task(task_id, queue_position=position)
+        resumed += len(jobs)
+    if resumed:
+        print(f"♻️  Resumed {resumed} unfinished downloads from the job journal")
 
 
 # =============================================================================
 # Main
 # =============================================================================
 
-if __name__ == '__main__':
+def start_server():
+    """Idle checker, banner and resumed jobs - once per process, before serving"""
     idle_thread = threading.Thread(target=check_idle_and_sleep, daemon=True)
     idle_thread.start()
     
@@ -563,8 +1881,15 @@ if __name__ == '__main__':
 ║  📁 Downloads: ~/Downloads                                ║
 ║  💤 State: SLEEPING (waiting for wakeup signal)           ║
 ║  ⏰ Auto-sleep: {IDLE_TIMEOUT//60} min of inactivity                      ║
-║  📋 Playlist: Supported (up to 50 videos)                 ║
+║  📋 Playlist: Supported (paged, lazy enumeration)         ║
+║  🧵 Parallel downloads: {MAX_CONCURRENT_DOWNLOADS} (queue: {MAX_QUEUED_DOWNLOADS})                    ║
 ╚═══════════════════════════════════════════════════════════╝
     """)
     
+    resume_jobs()
+
+
+if __name__ == '__main__':
+    # Development server - asgi.py is the supported way to serve
+    start_server()
     app.run(host='127.0.0.1', port=4321, debug=False, threaded=True)
@@ -0,0 +1,345 @@
+"""
+Tatarus YT Downloader - ASGI Server
+Supported serving mode on asyncio (uvicorn). Progress polls and progress
+streams are answered on the event loop, so an attached popup costs no
+thread; every other route is the Flask app, run on a bounded executor so
+blocking yt-dlp calls never stall the loop
+
+Usage (from the server folder):
+    python asgi.py [--host 127.0.0.1] [--port 4321]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+try:
+    import uvicorn
+except ImportError:  # only needed to serve, not to import the application
+    uvicorn = None
+
+import app
+
+HOST = '127.0.0.1'
+PORT = 4321
+
+# Flask routes (info extraction, download submission, admin) run here. Requests
+# beyond WSGI_WORKERS wait on the loop without holding a thread.
+WSGI_WORKERS = 32
+wsgi_executor = ThreadPoolExecutor(max_workers=WSGI_WORKERS, thread_name_prefix='wsgi')
+
+# Streamed Flask responses (NDJSON batches) run at most this many chunks ahead of the client
+WSGI_STREAM_BUFFER = 16
+
+# How often a Flask worker stuck behind a full buffer checks whether its client left
+CLIENT_GONE_POLL = 1.0
+
+CORS_HEADERS = [(b'access-control-allow-origin', b'*')]
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no')
+]
+
+
+class ClientGone(Exception):
+    """The client disconnected while a Flask response was still being produced"""
+
+
+# =============================================================================
+# Native endpoints (event loop)
+# =============================================================================
+
+async def send_json(send, body, status=200):
+    payload = json.dumps(body).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode()),
+        *CORS_HEADERS
+    ]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def health(scope, receive, send):
+    """Health check - always available"""
+    await send_json(send, {'status': 'ok', 'state': app.server_state})
+
+
+async def progress(scope, receive, send, task_id):
+    """Get download progress - requires AWAKE"""
+    if app.server_state == app.ServerState.SLEEPING:
+        return await send_json(send, app.sleeping_error(), 503)
+    app.update_activity()
+    task = app.task_progress(task_id)
+    if task is None:
+        return await send_json(send, {'error': 'Task not found'}, 404)
+    await send_json(send, task)
+
+
+async def progress_stream(scope, receive, send, task_id):
+    """Stream download progress as Server-Sent Events - requires AWAKE
+
+    Same events as the Flask route, but waiting for a change is an
+    asyncio.Event set from the publishing thread, not a blocked thread.
+    """
+    if app.server_state == app.ServerState.SLEEPING:
+        return await send_json(send, app.sleeping_error(), 503)
+    app.update_activity()
+    if task_id not in app.download_tasks:
+        return await send_json(send, {'error': 'Task not found'}, 404)
+
+    async def stream():
+        await send({'type': 'http.response.start', 'status': 200, 'headers': SSE_HEADERS + CORS_HEADERS})
+        min_interval = 1.0 / app.SSE_MAX_UPDATES_PER_SECOND
+        last_version = None
+        with TaskWatch(task_id) as watch:
+            while True:
+                version = await watch.wait(last_version, app.SSE_KEEPALIVE_SECONDS)
+                if version == last_version:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                    continue
+                last_version = version
+
+                task = app.task_progress(task_id)
+                if task is None:
+                    break
+                await send({'type': 'http.response.body', 'body': f'data: {json.dumps(task)}\n\n'.encode(),
+                            'more_body': True})
+                if task['status'] in app.TERMINAL_STATUSES:
+                    break
+                await asyncio.sleep(min_interval)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    await until_disconnected(receive, stream())
+
+
+class TaskWatch:
+    """Awaitable view of one task's version in `app.task_events`"""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def __enter__(self):
+        app.task_events.subscribe(self.task_id, self._notify)
+        return self
+
+    def __exit__(self, *exc_info):
+        app.task_events.unsubscribe(self.task_id, self._notify)
+
+    def _notify(self):
+        self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def wait(self, last_version, timeout):
+        """Current version once it differs from `last_version`, or `last_version` after `timeout`"""
+        # Clear before reading, so a publish between the two still wakes us
+        self._changed.clear()
+        version = app.task_events.version(self.task_id)
+        if version != last_version:
+            return version
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return last_version
+        return app.task_events.version(self.task_id)
+
+
+NATIVE_ROUTES = (
+    (re.compile(r'/api/health'), health),
+    (re.compile(r'/api/progress/(?P<task_id>[^/]+)'), progress),
+    (re.compile(r'/api/progress/(?P<task_id>[^/]+)/stream'), progress_stream),
+)
+
+
+# =============================================================================
+# Flask routes (executor)
+# =============================================================================
+
+def wsgi_environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP scope"""
+    server = scope.get('server') or (HOST, PORT)
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.input_terminated': True  # the whole body is buffered, with or without Content-Length
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def run_wsgi(environ, put, gone):
+    """Worker thread: call the Flask app and hand its response to the loop through `put`.
+
+    The whole response is produced on this one thread, because Flask's
+    streamed responses keep their request context on the generator. Stops
+    early once `gone` is set.
+    """
+    def start_response(status, headers, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        response[:] = [int(status.split(' ', 1)[0]),
+                       [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]]
+
+    def send_start():
+        if not started:
+            started.append(True)
+            put(('start', *response))
+
+    response = []
+    started = []
+    try:
+        result = app.app(environ, start_response)
+        try:
+            for chunk in result:
+                if gone.is_set():
+                    raise ClientGone()
+                if chunk:
+                    send_start()
+                    put(('body', chunk))
+            send_start()
+            put(('end',))
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+    except ClientGone:
+        pass
+    except Exception as e:
+        put(('error', e))
+
+
+async def wsgi(scope, receive, send):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(WSGI_STREAM_BUFFER)
+    gone = threading.Event()
+
+    def put(item):
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                return future.result(CLIENT_GONE_POLL)
+            except FutureTimeoutError:
+                if gone.is_set():
+                    future.cancel()
+                    raise ClientGone()
+
+    async def relay():
+        while True:
+            item = await queue.get()
+            if item[0] == 'start':
+                await send({'type': 'http.response.start', 'status': item[1], 'headers': item[2]})
+            elif item[0] == 'body':
+                await send({'type': 'http.response.body', 'body': item[1], 'more_body': True})
+            elif item[0] == 'error':
+                raise item[1]
+            else:
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+    loop.run_in_executor(wsgi_executor, run_wsgi, wsgi_environ(scope, body), put, gone)
+    try:
+        await until_disconnected(receive, relay())
+    finally:
+        gone.set()
+
+
+async def until_disconnected(receive, coro):
+    """Run `coro` (which sends the response) until it returns or the client disconnects"""
+    work = asyncio.ensure_future(coro)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({work, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        work.cancel()
+        disconnected.cancel()
+    if work.done() and not work.cancelled():
+        work.result()
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+# =============================================================================
+# Application
+# =============================================================================
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                wsgi_executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    if scope['method'] == 'GET':
+        for pattern, handler in NATIVE_ROUTES:
+            match = pattern.fullmatch(scope['path'])
+            if match:
+                return await handler(scope, receive, send, **match.groupdict())
+    await wsgi(scope, receive, send)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Tatarus YT Downloader on asyncio')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+
+    if uvicorn is None:
+        print("❌ uvicorn is not installed - pip install -r requirements.txt")
+        return 1
+    # Under pythonw (the Windows install) there is no console - uvicorn's default
+    # log config would fail to set up its colourized formatters
+    log_options = {} if sys.stdout and sys.stderr else {'log_config': None, 'use_colors': False}
+    app.start_server()
+    uvicorn.run(application, host=args.host, port=args.port, log_level='warning', timeout_graceful_shutdown=5,
+                **log_options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
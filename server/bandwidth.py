@@ -0,0 +1,136 @@
+"""
+Tatarus YT Downloader - Bandwidth Limiter
+Global token bucket shared by all downloads, split between active jobs by weight
+"""
+
+import threading
+import time
+
+
+class _Job:
+    __slots__ = ('weight', 'tokens', 'refilled', 'last_seen', 'streams', 'window_bytes', 'window_start', 'throughput')
+
+    def __init__(self, weight, now):
+        self.weight = weight
+        self.tokens = 0.0
+        self.refilled = now
+        self.last_seen = 0.0
+        self.streams = {}  # stream key -> bytes reported so far
+        self.window_bytes = 0
+        self.window_start = now
+        self.throughput = 0.0
+
+
+class BandwidthLimiter:
+    """Caps the combined download rate at `rate` bytes/sec (0 = unlimited).
+
+    Every job has its own token bucket, refilled at rate * weight / total
+    weight of the jobs that moved bytes within the last `active_window`
+    seconds - so a job stuck extracting or post-processing gives its share
+    to the others. Downloads report progress through `transferred`, which
+    sleeps until the job is back within its share.
+
+    While unlimited, reports only feed the throughput stats, so a job's
+    reports closer together than `sample_interval` seconds skip the lock;
+    their bytes are counted with the next sample, since reports carry the
+    running total of each file.
+    """
+
+    def __init__(self, rate=0, active_window=2.0, burst=0.5, sample_interval=0.25):
+        self.rate = rate
+        self.active_window = active_window
+        self.burst = burst  # seconds of a job's share it may bank while idle
+        self.sample_interval = sample_interval
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = rate
+
+    def register(self, job_id, weight=1.0):
+        """Start tracking a job (or change the weight of a running one)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                self._jobs[job_id] = _Job(weight, time.monotonic())
+            else:
+                job.weight = weight
+
+    def set_weight(self, job_id, weight):
+        """Change a running job's weight - returns False for an unknown job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.weight = weight
+            return job is not None
+
+    def release(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def transferred(self, job_id, stream, downloaded, interrupted=None):
+        """Account a progress report of `downloaded` bytes so far for one file of a job.
+
+        Blocks while the job is over its share, waking up early if
+        `interrupted()` turns true.
+        """
+        if not self.rate:
+            job = self._jobs.get(job_id)
+            if job is None or time.monotonic() - job.last_seen < self.sample_interval:
+                return
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            now = time.monotonic()
+            nbytes = max(0, downloaded - job.streams.get(stream, 0))
+            job.streams[stream] = max(downloaded, job.streams.get(stream, 0))
+            self._measure_locked(job, nbytes, now)
+            if not self.rate:
+                return
+            share = self._share_locked(job, now)
+            job.tokens = min(job.tokens + (now - job.refilled) * share, share * self.burst)
+            job.refilled = now
+            job.tokens -= nbytes
+            delay = -job.tokens / share if job.tokens < 0 else 0
+        deadline = time.monotonic() + delay
+        while delay > 0 and not (interrupted and interrupted()):
+            time.sleep(min(delay, 0.25))
+            delay = deadline - time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            jobs = {
+                job_id: {
+                    'weight': job.weight,
+                    'bytes_per_sec': round(job.throughput) if now - job.last_seen <= self.active_window else 0
+                }
+                for job_id, job in self._jobs.items()
+            }
+        return {
+            'rate': self.rate,
+            'bytes_per_sec': sum(job['bytes_per_sec'] for job in jobs.values()),
+            'jobs': jobs
+        }
+
+    def _share_locked(self, job, now):
+        active = sum(
+            other.weight for other in self._jobs.values()
+            if other is job or now - other.last_seen <= self.active_window
+        )
+        return self.rate * job.weight / active
+
+    def _measure_locked(self, job, nbytes, now):
+        """Per-job throughput over roughly one-second windows"""
+        if now - job.last_seen > self.active_window:
+            job.window_bytes = 0
+            job.window_start = now
+        job.last_seen = now
+        job.window_bytes += nbytes
+        elapsed = now - job.window_start
+        if elapsed >= 1.0:
+            job.throughput = job.window_bytes / elapsed
+            job.window_bytes = 0
+            job.window_start = now
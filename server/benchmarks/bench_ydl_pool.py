@@ -0,0 +1,114 @@
+"""
+Tatarus YT Downloader - YoutubeDL Pool Benchmark
+Compare per-job setup cost of a fresh YoutubeDL per job vs a pooled one
+
+Usage (from the server folder):
+    python benchmarks/bench_ydl_pool.py [--jobs 20] [--url https://www.youtube.com/]
+
+Without --url the requests go to a local HTTP/1.1 keep-alive server, so the
+numbers show instance construction and TCP connection reuse but no TLS
+handshakes - real hosts make the gap wider.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+from ydl_pool import YoutubeDLPool  # noqa: E402
+
+OPTIONS = {'quiet': True, 'no_warnings': True}
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        KeepAliveHandler.connections += 1
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fetch(ydl, url):
+    with ydl.urlopen(url) as response:
+        response.read()
+
+
+def measure(jobs, url, run_job):
+    """Per-job timings in ms of `run_job(url)` plus connections opened (local server only)"""
+    KeepAliveHandler.connections = 0
+    timings = []
+    for _ in range(jobs):
+        started = time.perf_counter()
+        run_job(url)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'first_ms': round(timings[0], 2),
+        'p50_ms': round(statistics.median(timings), 2),
+        'total_ms': round(sum(timings), 2),
+        'connections': KeepAliveHandler.connections
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fresh vs pooled YoutubeDL instances')
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--url', help='Fetch this URL instead of a local keep-alive server')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/'
+
+    def fresh_job(job_url):
+        with yt_dlp.YoutubeDL(OPTIONS) as ydl:
+            fetch(ydl, job_url)
+
+    pool = YoutubeDLPool()
+
+    def pooled_job(job_url):
+        with pool.checkout('info', OPTIONS) as ydl:
+            fetch(ydl, job_url)
+
+    try:
+        results = {
+            'url': url,
+            'jobs': args.jobs,
+            'fresh': measure(args.jobs, url, fresh_job),
+            'pooled': measure(args.jobs, url, pooled_job)
+        }
+    finally:
+        pool.clear()
+        if server:
+            server.shutdown()
+
+    if args.url:
+        for mode in ('fresh', 'pooled'):
+            del results[mode]['connections']
+    results['pooled']['instances_created'] = pool.created
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
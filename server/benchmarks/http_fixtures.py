@@ -0,0 +1,77 @@
+"""
+Tatarus YT Downloader - HTTP Fixtures
+Record yt-dlp's HTTP traffic once, then replay it offline for benchmarks
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import urllib.request
+
+import yt_dlp
+from yt_dlp.networking import Request, Response
+
+
+def request_key(req):
+    """Stable key for a request: method, URL and a hash of the body"""
+    if isinstance(req, str):
+        req = Request(req)
+    elif isinstance(req, urllib.request.Request):
+        req = Request(req.full_url, data=req.data, method=req.get_method())
+    data = req.data if isinstance(req.data, bytes) else b''
+    return f'{req.method} {req.url} {hashlib.sha1(data).hexdigest()[:12]}'
+
+
+class HttpFixtures:
+    """Patch `YoutubeDL.urlopen` to record responses to, or replay them from, a JSON file"""
+
+    def __init__(self, path, mode='replay'):
+        self.path = path
+        self.mode = mode
+        self.responses = {}
+        self._original = None
+        if os.path.exists(path):
+            with open(path) as f:
+                self.responses = json.load(f)
+
+    def __enter__(self):
+        self._original = yt_dlp.YoutubeDL.urlopen
+        fixtures = self
+
+        def urlopen(ydl, req):
+            if fixtures.mode == 'record':
+                return fixtures._record(ydl, req)
+            return fixtures._replay(req)
+
+        yt_dlp.YoutubeDL.urlopen = urlopen
+        return self
+
+    def __exit__(self, *exc):
+        yt_dlp.YoutubeDL.urlopen = self._original
+        if self.mode == 'record':
+            with open(self.path, 'w') as f:
+                json.dump(self.responses, f)
+
+    def _record(self, ydl, req):
+        key = request_key(req)
+        response = self._original(ydl, req)
+        body = response.read()
+        self.responses[key] = {
+            'url': response.url,
+            'status': response.status,
+            'headers': dict(response.headers),
+            'body': base64.b64encode(body).decode('ascii')
+        }
+        return Response(io.BytesIO(body), response.url, dict(response.headers), status=response.status)
+
+    def _replay(self, req):
+        key = request_key(req)
+        recorded = self.responses.get(key)
+        if recorded is None:
+            raise RuntimeError(f'No recorded response for {key}')
+        return Response(
+            io.BytesIO(base64.b64decode(recorded['body'])),
+            recorded['url'], recorded['headers'], status=recorded['status']
+        )
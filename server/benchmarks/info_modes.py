@@ -0,0 +1,124 @@
+"""
+Tatarus YT Downloader - Info Mode Benchmark
+Compare time-to-first-byte and peak memory of /api/info in full vs lite mode
+
+Usage (from the server folder):
+    python benchmarks/info_modes.py record <url> [<url> ...]   # needs network, once
+    python benchmarks/info_modes.py run [--repeat 5]           # offline, from fixtures
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+sys.path.insert(0, SERVER_DIR)
+
+# Keep yt-dlp's player cache out of the picture so record and replay issue the same requests
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='tatarus-bench-')
+
+import app  # noqa: E402
+from metadata_store import MetadataStore  # noqa: E402
+from http_fixtures import HttpFixtures  # noqa: E402
+
+MODES = ('full', 'lite')
+
+
+def fixture_path(video_id):
+    return os.path.join(FIXTURE_DIR, f'info-{video_id}.json')
+
+
+def reset_caches():
+    app.info_cache.clear()
+    app.metadata_store.prune(everything=True)
+    app.ydl_pool.clear()
+
+
+def request_info(client, url, mode):
+    """Return (seconds to first body byte, peak traced bytes, status code)"""
+    reset_caches()
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get('/api/info', query_string={'url': url, 'mode': mode}, buffered=False)
+    next(iter(response.response), b'')
+    ttfb = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return ttfb, peak, response.status_code
+
+
+def record(client, urls):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for url in urls:
+        video_id = app.extract_video_id(url)
+        if not video_id:
+            print(f"❌ Not a video URL: {url}")
+            continue
+        with HttpFixtures(fixture_path(video_id), mode='record'):
+            for mode in MODES:
+                _, _, status = request_info(client, url, mode)
+                print(f"🎙️  {video_id} [{mode}] -> {status}")
+
+
+def run(client, repeat):
+    names = os.listdir(FIXTURE_DIR) if os.path.isdir(FIXTURE_DIR) else []
+    fixtures = sorted(name for name in names if name.startswith('info-') and name.endswith('.json'))
+    if not fixtures:
+        print('No fixtures found - run "record" first', file=sys.stderr)
+        return 1
+
+    results = {}
+    for name in fixtures:
+        video_id = name[len('info-'):-len('.json')]
+        url = f'https://www.youtube.com/watch?v={video_id}'
+        results[video_id] = {}
+        with HttpFixtures(os.path.join(FIXTURE_DIR, name), mode='replay'):
+            for mode in MODES:
+                ttfbs, peaks = [], []
+                for _ in range(repeat):
+                    ttfb, peak, status = request_info(client, url, mode)
+                    if status != 200:
+                        raise RuntimeError(f'{video_id} [{mode}] returned {status}')
+                    ttfbs.append(ttfb * 1000)
+                    peaks.append(peak)
+                results[video_id][mode] = {
+                    'ttfb_ms_p50': round(statistics.median(ttfbs), 2),
+                    'ttfb_ms_min': round(min(ttfbs), 2),
+                    'peak_kib': round(max(peaks) / 1024, 1)
+                }
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/info full vs lite mode')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record_parser = subparsers.add_parser('record', help='Record HTTP fixtures for URLs (needs network)')
+    record_parser.add_argument('urls', nargs='+')
+    run_parser = subparsers.add_parser('run', help='Replay fixtures and print results as JSON')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Benchmarks never touch the real metadata store
+    app.metadata_store = MetadataStore(':memory:', 'benchmark')
+    app.server_state = app.ServerState.AWAKE
+    # Measure the lookup alone, without the background full extraction a lite one starts
+    app.prefetch_full_info = lambda url: None
+    client = app.app.test_client()
+
+    if args.command == 'record':
+        record(client, args.urls)
+        return 0
+    return run(client, args.repeat)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
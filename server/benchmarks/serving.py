@@ -0,0 +1,272 @@
+"""
+Tatarus YT Downloader - Serving Benchmark
+Compare the threaded Werkzeug server (python app.py) with the asyncio serving
+mode (python asgi.py) while many progress streams and pollers are attached
+
+Usage (from the server folder):
+    python benchmarks/serving.py [--server werkzeug --server asgi] [--streams 500] [--pollers 32]
+                                 [--info-clients 4] [--duration 15] [--output serving.json]
+
+Each server runs in its own process, with --tasks fake downloads whose
+progress changes SSE_MAX_UPDATES_PER_SECOND times a second. The benchmark
+opens --streams progress streams at once, spread over those tasks, and
+then for --duration seconds runs --pollers clients polling
+/api/progress/<id> and --info-clients clients doing cold
+/api/info?mode=lite lookups against the stand-in server. Every poll is a
+fresh connection. Reported per server:
+
+    streams   connected (got an event), alive at the end, failed, connect p99
+    progress  completed polls, errors, polls/s, p50/p99 latency
+    info      the same for the info lookups
+    server    peak thread count and peak RSS of the server process
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+
+from throughput import Bench, peak_rss_mb, percentile, resource  # also sets up sys.path
+from standin import video_id_for
+
+SERVERS = ('werkzeug', 'asgi')
+SCALE = 0.01  # no media is downloaded - only extractor results are served
+REQUEST_TIMEOUT = 30
+STREAM_SETTLE_SECONDS = 3
+STREAM_ALIVE_SECONDS = 2  # a stream is alive if it got an event this recently when the run ends
+
+
+def raise_fd_limit():
+    """Every stream is a socket on both ends - lift the soft open-file limit to the hard one"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = 65536 if hard == resource.RLIM_INFINITY else min(hard, 65536)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+# =============================================================================
+# Server process
+# =============================================================================
+
+def serve(server, tasks):
+    """Child process: serve the app with fake running tasks until stdin closes"""
+    raise_fd_limit()
+    bench = Bench(SCALE, server=server)
+    app = bench.app
+    task_ids = [str(uuid.uuid4()) for _ in range(tasks)]
+    for task_id in task_ids:
+        app.download_tasks.create(task_id)
+        app.download_tasks.update(task_id, status='downloading', total_bytes=100 * 1024 * 1024)
+    peak = {'threads': threading.active_count()}
+
+    def drive():
+        interval = 1.0 / app.SSE_MAX_UPDATES_PER_SECOND
+        for step in itertools.count(1):
+            for task_id in task_ids:
+                app.download_tasks.update(task_id, progress=step % 100, downloaded_bytes=step * 1024 * 1024 % (100 * 1024 * 1024))
+            peak['threads'] = max(peak['threads'], threading.active_count())
+            time.sleep(interval)
+
+    threading.Thread(target=drive, daemon=True).start()
+    print(json.dumps({'url': bench.url, 'task_ids': task_ids}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps({'threads_peak': peak['threads'], 'peak_rss_mb': peak_rss_mb()}), flush=True)
+    sys.stdin.readline()
+    bench.close()
+
+
+# =============================================================================
+# Load
+# =============================================================================
+
+async def get(host, port, path):
+    """One GET on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n'.encode())
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def hold_stream(host, port, path, record):
+    """Keep one progress stream open, noting when it connected and when the last event came"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: text/event-stream\r\n\r\n'.encode())
+        status_line = await reader.readline()
+        if int(status_line.split()[1]) != 200:
+            raise ConnectionError(status_line.decode().strip())
+        tail = b''
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                raise ConnectionError('stream closed')
+            if b'data: ' in tail + chunk:
+                if record['events'] == 0:
+                    record['connect_ms'] = (time.perf_counter() - started) * 1000
+                record['events'] += 1
+                record['last_event'] = time.perf_counter()
+            tail = chunk[-6:]
+    finally:
+        writer.close()
+
+
+async def poll(host, port, paths, deadline, latencies, errors):
+    """Request `paths` back to back until `deadline`"""
+    for path in paths:
+        if time.perf_counter() >= deadline:
+            return
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(get(host, port, path), REQUEST_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            status = None
+        if status == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            errors.append(status)
+
+
+def summary(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'per_s': round(len(latencies) / elapsed, 1),
+        'latency_ms_p50': round(percentile(latencies, 50), 1) if latencies else None,
+        'latency_ms_p99': round(percentile(latencies, 99), 1) if latencies else None
+    }
+
+
+async def load(url, task_ids, streams, pollers, info_clients, duration):
+    host, port = url.rsplit('/', 1)[-1].split(':')
+    port = int(port)
+    records = [{'events': 0, 'last_event': None, 'connect_ms': None, 'error': None} for _ in range(streams)]
+
+    async def stream(i):
+        try:
+            await hold_stream(host, port, f'/api/progress/{task_ids[i % len(task_ids)]}/stream', records[i])
+        except (OSError, ValueError, IndexError) as e:
+            records[i]['error'] = str(e) or type(e).__name__
+
+    stream_tasks = [asyncio.ensure_future(stream(i)) for i in range(streams)]
+    await asyncio.sleep(STREAM_SETTLE_SECONDS)
+
+    progress_latencies, progress_errors = [], []
+    info_latencies, info_errors = [], []
+    started = time.perf_counter()
+    deadline = started + duration
+    progress_paths = (f'/api/progress/{task_ids[n % len(task_ids)]}' for n in itertools.count())
+    info_paths = (
+        '/api/info?' + urllib.parse.urlencode({'url': f'https://www.youtube.com/watch?v={video_id_for(n)}', 'mode': 'lite'})
+        for n in itertools.count(1)
+    )
+    await asyncio.gather(
+        *(poll(host, port, progress_paths, deadline, progress_latencies, progress_errors) for _ in range(pollers)),
+        *(poll(host, port, info_paths, deadline, info_latencies, info_errors) for _ in range(info_clients))
+    )
+    elapsed = time.perf_counter() - started
+    ended = time.perf_counter()
+
+    for task in stream_tasks:
+        task.cancel()
+    await asyncio.gather(*stream_tasks, return_exceptions=True)
+    connect_ms = [record['connect_ms'] for record in records if record['connect_ms'] is not None]
+    return {
+        'streams': {
+            'requested': streams,
+            'connected': sum(1 for record in records if record['events']),
+            'alive': sum(1 for record in records
+                         if record['last_event'] and ended - record['last_event'] <= STREAM_ALIVE_SECONDS),
+            'failed': sum(1 for record in records if record['error']),
+            'connect_ms_p99': round(percentile(connect_ms, 99), 1) if connect_ms else None
+        },
+        'progress': summary(progress_latencies, progress_errors, elapsed),
+        'info': summary(info_latencies, info_errors, elapsed)
+    }
+
+
+def run(servers, tasks, streams, pollers, info_clients, duration, output):
+    raise_fd_limit()
+    results = {}
+    for server in servers:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), 'serve', server, '--tasks', str(tasks)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        try:
+            ready = json.loads(process.stdout.readline())
+            result = asyncio.run(load(ready['url'], ready['task_ids'], streams, pollers, info_clients, duration))
+            process.stdin.write('\n')
+            process.stdin.flush()
+            result['server'] = json.loads(process.stdout.readline())
+            process.stdin.write('\n')
+            process.stdin.flush()
+        finally:
+            process.stdin.close()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        results[server] = result
+        print(f"⏱️  {server}: {json.dumps(result)}", file=sys.stderr)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'tasks': tasks,
+            'streams': streams,
+            'pollers': pollers,
+            'info_clients': info_clients,
+            'duration_s': duration
+        },
+        'servers': results
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare serving modes under many attached progress streams')
+    subparsers = parser.add_subparsers(dest='command')
+    serve_parser = subparsers.add_parser('serve')  # internal - one server per process
+    serve_parser.add_argument('server', choices=SERVERS)
+    serve_parser.add_argument('--tasks', type=int, required=True)
+    parser.add_argument('--server', action='append', choices=SERVERS, help='Repeatable; default both')
+    parser.add_argument('--tasks', type=int, default=50, help='Fake running downloads to stream')
+    parser.add_argument('--streams', type=int, default=500, help='Progress streams held open')
+    parser.add_argument('--pollers', type=int, default=32, help='Clients polling /api/progress')
+    parser.add_argument('--info-clients', type=int, default=4, help='Clients doing cold /api/info lookups')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds of polling')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.server, args.tasks)
+        return 0
+    return run(args.server or SERVERS, args.tasks, args.streams, args.pollers, args.info_clients,
+               args.duration, args.output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Tatarus YT Downloader - Stand-in Media Server
+Local HTTP server that plays YouTube for the throughput benchmarks: it serves
+extractor results (recorded or synthetic) and synthetic progressive and DASH
+media, and `StandInYoutubeDL` extracts from it instead of youtube.com
+
+Synthetic media is patterned filler rather than real audio/video, so it can be
+fetched but not merged or transcoded. Every synthetic format therefore carries
+both video and audio, and nothing needs ffmpeg.
+"""
+
+import json
+import os
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from staged_ydl import StagedYoutubeDL
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+MiB = 1024 * 1024
+FRAGMENT_SIZE = 2 * MiB
+BLOCK = bytes(range(256)) * 256  # 64 KiB of filler
+
+# format_id, height, size in MiB at scale 1, served as DASH fragments
+SYNTHETIC_FORMATS = (
+    ('dash-2160', 2160, 64, True),
+    ('http-1080', 1080, 16, False),
+    ('http-720', 720, 8, False),
+    ('http-360', 360, 3, False),
+)
+
+
+def video_id_for(n):
+    """11-character video ID accepted by `extract_video_id`"""
+    return f'bench{n:06d}'
+
+
+def playlist_id_for(count):
+    return f'PLbench{count}'
+
+
+def recorded_fixtures():
+    """Extractor results saved by `throughput.py record`, if any"""
+    names = os.listdir(FIXTURE_DIR) if os.path.isdir(FIXTURE_DIR) else []
+    fixtures = []
+    for name in sorted(names):
+        if name.startswith('extract-') and name.endswith('.json'):
+            with open(os.path.join(FIXTURE_DIR, name)) as f:
+                fixtures.append(json.load(f))
+    return fixtures
+
+
+class StandInServer:
+    """Threaded HTTP/1.1 server on 127.0.0.1 with these routes:
+
+    /extract?url=<youtube url>  extractor result for a watch or playlist URL
+    /media/<size>/<name>        `size` bytes of filler, with Range support
+
+    Video IDs are answered round-robin from the recorded fixtures when
+    `use_recorded` is set and there are some, otherwise synthetically.
+    """
+
+    def __init__(self, scale=1.0, use_recorded=False):
+        self.scale = scale
+        self.recorded = recorded_fixtures() if use_recorded else []
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name='standin', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def count(self, nbytes):
+        with self._lock:
+            self.bytes_served += nbytes
+
+    def extract(self, url):
+        """Extractor result for a YouTube URL, or None"""
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        if '/playlist' in url and query.get('list'):
+            return self.playlist_info(query['list'][0])
+        video_id = (query.get('v') or [None])[0]
+        return self.video_info(video_id) if video_id else None
+
+    def playlist_info(self, playlist_id):
+        match = re.fullmatch(r'PLbench(\d+)', playlist_id)
+        count = int(match.group(1)) if match else 0
+        entries = [
+            {'_type': 'url', 'ie_key': 'Youtube', 'id': video_id_for(n), 'title': f'Benchmark video {n}',
+             'url': f'https://www.youtube.com/watch?v={video_id_for(n)}'}
+            for n in range(1, count + 1)
+        ]
+        return {
+            '_type': 'playlist', 'id': playlist_id, 'title': f'Benchmark playlist ({count})',
+            'playlist_count': count, 'entries': entries,
+            'extractor': 'youtube:tab', 'extractor_key': 'YoutubeTab',
+            'webpage_url': f'https://www.youtube.com/playlist?list={playlist_id}'
+        }
+
+    def video_info(self, video_id):
+        url = f'https://www.youtube.com/watch?v={video_id}'
+        if self.recorded:
+            info = dict(self.recorded[sum(map(ord, video_id)) % len(self.recorded)])
+            info.update(id=video_id, webpage_url=url)
+            return info
+        formats = []
+        for format_id, height, size_mib, fragmented in SYNTHETIC_FORMATS:
+            size = max(1, int(size_mib * MiB * self.scale))
+            fmt = {
+                'format_id': format_id, 'ext': 'mp4', 'height': height, 'width': height * 16 // 9,
+                'vcodec': 'avc1.640033', 'acodec': 'mp4a.40.2', 'filesize': size,
+                'tbr': round(size * 8 / 1000 / 60, 1)
+            }
+            name = f'{video_id}-{format_id}'
+            if fragmented:
+                sizes = [FRAGMENT_SIZE] * (size // FRAGMENT_SIZE) + ([size % FRAGMENT_SIZE] if size % FRAGMENT_SIZE else [])
+                fmt.update(protocol='http_dash_segments', url=f'{self.url}/media/{size}/{name}.mpd', fragments=[
+                    {'url': f'{self.url}/media/{part}/{name}-{i}', 'duration': 2.0} for i, part in enumerate(sizes)
+                ])
+            else:
+                fmt.update(protocol='http', url=f'{self.url}/media/{size}/{name}')
+            formats.append(fmt)
+        return {
+            'id': video_id, 'title': f'Benchmark video {video_id}', 'uploader': 'Benchmark',
+            'duration': 60, 'thumbnail': f'{self.url}/media/1024/{video_id}.jpg', 'formats': formats,
+            'extractor': 'youtube', 'extractor_key': 'Youtube', 'webpage_url': url
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_HEAD(self):
+                self.do_GET(head=True)
+
+            def do_GET(self, head=False):
+                path, _, query = self.path.partition('?')
+                if path == '/extract':
+                    url = urllib.parse.parse_qs(query).get('url', [''])[0]
+                    info = server.extract(url)
+                    if info is None:
+                        return self.send_error(404)
+                    body = json.dumps(info).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    if not head:
+                        self.wfile.write(body)
+                    return
+                match = re.fullmatch(r'/media/(\d+)/[\w.-]+', path)
+                if not match:
+                    return self.send_error(404)
+                self.send_media(int(match.group(1)), head)
+
+            def send_media(self, size, head):
+                start, end = 0, size - 1
+                ranged = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+                if ranged and (ranged.group(1) or ranged.group(2)):
+                    if ranged.group(1):
+                        start = int(ranged.group(1))
+                        end = min(int(ranged.group(2)), size - 1) if ranged.group(2) else size - 1
+                    else:
+                        start = max(0, size - int(ranged.group(2)))
+                    if start > end:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{size}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Type', 'video/mp4')
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.end_headers()
+                if head:
+                    return
+                block = memoryview(BLOCK)
+                position = start
+                try:
+                    while position <= end:
+                        offset = position % len(BLOCK)
+                        chunk = block[offset:offset + min(len(BLOCK) - offset, end - position + 1)]
+                        self.wfile.write(chunk)
+                        position += len(chunk)
+                finally:
+                    server.count(position - start)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StandInYoutubeDL(StagedYoutubeDL):
+    """YoutubeDL that takes extractor results from a `StandInServer` (set `server_url`)"""
+
+    server_url = None
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True,
+                     force_generic_extractor=False):
+        query = urllib.parse.urlencode({'url': url})
+        with self.urlopen(f'{self.server_url}/extract?{query}') as response:
+            info = json.load(response)
+        if not process:
+            return info
+        return self.process_ie_result(info, download=download, extra_info=extra_info)
@@ -0,0 +1,222 @@
+"""
+Tatarus YT Downloader - Startup Benchmark
+Measure the cold start against a budget, what a wake-up and the first
+/api/info after it cost, and how much memory going to sleep gives back
+
+Usage (from the server folder):
+    python benchmarks/startup.py [--runs 5] [--output startup.json]
+
+Measurements:
+    import_ms         `import app` in a fresh interpreter (median of --runs)
+    ready_ms          starting the asgi server in a fresh interpreter until
+                      /api/health answers (median of --runs)
+    ready_rss_mb      RSS of that server once ready
+    yt_dlp_at_start   whether startup imported yt_dlp - it should not
+    prewarm_ms        /api/wakeup on that server until the background
+                      pre-warm (yt_dlp import, first extractor) is done -
+                      time no longer spent inside the first /api/info
+    first_info_ms     first /api/info?mode=lite after /api/wakeup: with the
+                      pre-warm switched off, with it running in the
+                      background, and once it has finished
+    sleep_rss_mb      RSS after INFO_LOOKUPS lookups, and after going to sleep
+
+Exits non-zero when import_ms or ready_ms is over its budget, or when
+startup imported yt_dlp. Wake-up and
+sleep are measured against the stand-in server, so need no network.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+from throughput import SERVER_DIR, Bench
+
+IMPORT_BUDGET_MS = 300
+READY_BUDGET_MS = 600
+INFO_LOOKUPS = 200
+READY_TIMEOUT = 30
+
+IMPORT_SNIPPET = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+print(json.dumps({'import_ms': (time.perf_counter() - started) * 1000, 'yt_dlp': 'yt_dlp' in sys.modules}))
+'''
+
+# The app's own start_server() is left out - it would resume journaled jobs
+SERVE_SNIPPET = '''
+import sys
+import asgi, uvicorn
+uvicorn.run(asgi.application, host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')
+'''
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid):
+    """Current RSS of a process (Linux), or None"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+def measure_import():
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=SERVER_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def measure_ready():
+    """Milliseconds from spawn until /api/health answers, RSS then, whether yt_dlp got
+    imported, and milliseconds from /api/wakeup until the pre-warmed instance is idle"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SERVE_SNIPPET, str(port)], cwd=SERVER_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < READY_TIMEOUT:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1) as response:
+                    response.read()
+                break
+            except OSError:
+                time.sleep(0.005)
+        ready_ms = (time.perf_counter() - started) * 1000
+        rss = rss_mb(process.pid)
+        yt_dlp_loaded = get_json(f'http://127.0.0.1:{port}/api/status')['memory']['yt_dlp_loaded']
+
+        started = time.perf_counter()
+        get_json(f'http://127.0.0.1:{port}/api/wakeup')
+        while get_json(f'http://127.0.0.1:{port}/api/status')['ydl_pool']['idle'] < 1:
+            if time.perf_counter() - started > READY_TIMEOUT:
+                raise TimeoutError('pre-warm did not finish')
+            time.sleep(0.005)
+        prewarm_ms = (time.perf_counter() - started) * 1000
+        return ready_ms, rss, yt_dlp_loaded, prewarm_ms
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure_wake(result_file):
+    """Child process: wake-up and sleep against the stand-in server"""
+    bench = Bench(0.01, server='asgi')
+    app = bench.app
+    video_numbers = iter(range(1, 1000000))
+    prewarm = app.prewarm
+
+    def first_info(with_prewarm, wait_for_prewarm=False):
+        app.prewarm = prewarm if with_prewarm else (lambda: None)
+        app.go_to_sleep()
+        bench.request('/api/wakeup')
+        if wait_for_prewarm:
+            time.sleep(0.05)
+            with app.prewarm_lock:
+                pass
+        url = f'https://www.youtube.com/watch?v=bench{next(video_numbers):06d}'
+        started = time.perf_counter()
+        bench.request('/api/info?' + urllib.parse.urlencode({'url': url, 'mode': 'lite'}))
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    try:
+        result = {'first_info_ms': {
+            'no_prewarm': first_info(False),
+            'prewarm_running': first_info(True),
+            'prewarm_done': first_info(True, wait_for_prewarm=True)
+        }}
+        for _ in range(INFO_LOOKUPS):
+            url = f'https://www.youtube.com/watch?v=bench{next(video_numbers):06d}'
+            bench.request('/api/info?' + urllib.parse.urlencode({'url': url, 'mode': 'lite'}))
+        awake = app.current_rss_mb()
+        app.go_to_sleep()
+        result['sleep_rss_mb'] = {'awake': awake, 'asleep': app.current_rss_mb()}
+    finally:
+        bench.close()
+    with open(result_file, 'w') as f:
+        json.dump(result, f)
+
+
+def run(runs, output):
+    imports = [measure_import() for _ in range(runs)]
+    readies = [measure_ready() for _ in range(runs)]
+    import_ms = statistics.median(item['import_ms'] for item in imports)
+    ready_ms = statistics.median(ready for ready, _, _, _ in readies)
+
+    fd, result_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        subprocess.run([sys.executable, os.path.abspath(__file__), 'wake', '--result-file', result_file],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(result_file) as f:
+            wake = json.load(f)
+    finally:
+        os.remove(result_file)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'runs': runs
+        },
+        'import_ms': round(import_ms, 1),
+        'import_budget_ms': IMPORT_BUDGET_MS,
+        'ready_ms': round(ready_ms, 1),
+        'ready_budget_ms': READY_BUDGET_MS,
+        'ready_rss_mb': max((rss for _, rss, _, _ in readies if rss is not None), default=None),
+        'yt_dlp_at_start': any(item['yt_dlp'] for item in imports) or any(loaded for _, _, loaded, _ in readies),
+        'prewarm_ms': round(statistics.median(prewarm for _, _, _, prewarm in readies), 1),
+        **wake
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    within_budget = import_ms <= IMPORT_BUDGET_MS and ready_ms <= READY_BUDGET_MS
+    if not within_budget:
+        print(f"❌ Over the startup budget ({IMPORT_BUDGET_MS} ms import, {READY_BUDGET_MS} ms ready)", file=sys.stderr)
+    if report['yt_dlp_at_start']:
+        print("❌ yt_dlp was imported at startup", file=sys.stderr)
+    return 0 if within_budget and not report['yt_dlp_at_start'] else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start, wake-up and sleep measurements')
+    subparsers = parser.add_subparsers(dest='command')
+    wake_parser = subparsers.add_parser('wake')  # internal - runs in its own process
+    wake_parser.add_argument('--result-file', required=True)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per cold start measurement')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'wake':
+        measure_wake(args.result_file)
+        return 0
+    return run(args.runs, args.output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
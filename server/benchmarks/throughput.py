@@ -0,0 +1,307 @@
+"""
+Tatarus YT Downloader - Throughput Benchmark
+Run download and info scenarios end to end against a local stand-in for
+YouTube, and report MB/s, jobs/min, latency and peak RSS as JSON
+
+Usage (from the server folder):
+    python benchmarks/throughput.py run [--scenario single_4k ...] [--scale 0.25] [--output results.json]
+    python benchmarks/throughput.py record <url> [<url> ...]   # needs network, once
+
+Scenarios:
+    single_4k      one 2160p download, fetched as DASH fragments
+    playlist_50    one 50-entry playlist job at 360p
+    concurrent_20  20 single 720p downloads submitted at once
+    info_storm     200 cold /api/info?mode=lite lookups, 16 at a time
+
+Each scenario runs in its own process so peak RSS is per scenario. The app is
+served over real HTTP on 127.0.0.1, and downloads go through the scheduler,
+the ydl pool and the processing stage exactly as in production. Media sizes
+are multiplied by --scale. info_storm replays extractor results recorded with
+"record" when there are any, otherwise synthetic ones.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Keep yt-dlp's cache out of the picture so every run starts cold
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='tatarus-bench-')
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import yt_dlp  # noqa: E402
+from standin import FIXTURE_DIR, StandInServer, StandInYoutubeDL, playlist_id_for, video_id_for  # noqa: E402
+
+SCENARIOS = ('single_4k', 'playlist_50', 'concurrent_20', 'info_storm')
+QUALITY_2160 = 'bestvideo[height<=2160]+bestaudio/best[height<=2160]'
+QUALITY_720 = 'bestvideo[height<=720]+bestaudio/best[height<=720]'
+QUALITY_360 = 'bestvideo[height<=360]+bestaudio/best[height<=360]'
+INFO_STORM_REQUESTS = 200
+INFO_STORM_CONCURRENCY = 16
+POLL_INTERVAL = 0.02
+JOB_TIMEOUT = 600
+
+
+def percentile(values, q):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Bench:
+    """The app, served over HTTP, wired to a stand-in server and throwaway storage.
+
+    `server` is 'werkzeug' (the threaded dev server app.py runs) or 'asgi'
+    (asgi.py on uvicorn).
+    """
+
+    def __init__(self, scale, use_recorded=False, server='werkzeug'):
+        import app
+        from journal import JobJournal
+        from media_index import MediaIndex
+        from metadata_store import MetadataStore
+        from werkzeug.serving import make_server
+
+        self.app = app
+        self.folder = tempfile.mkdtemp(prefix='tatarus-bench-downloads-')
+        self.standin = StandInServer(scale, use_recorded).start()
+        StandInYoutubeDL.server_url = self.standin.url
+
+        app.DOWNLOAD_FOLDER = self.folder
+        app.metadata_store = MetadataStore(':memory:', 'benchmark')
+        app.media_index = MediaIndex(':memory:')
+        app.job_journal = JobJournal(os.path.join(self.folder, 'jobs.journal'))
+        app.ydl_pool.factory = StandInYoutubeDL
+        app.server_state = app.ServerState.AWAKE
+
+        if server == 'asgi':
+            import asgi
+            import uvicorn
+
+            sock = socket.socket()
+            sock.bind(('127.0.0.1', 0))
+            self.url = f'http://127.0.0.1:{sock.getsockname()[1]}'
+            self._uvicorn = uvicorn.Server(uvicorn.Config(asgi.application, log_level='warning', lifespan='off'))
+            threading.Thread(target=self._uvicorn.run, kwargs={'sockets': [sock]}, daemon=True).start()
+            while not self._uvicorn.started:
+                time.sleep(POLL_INTERVAL)
+            self._httpd = None
+        else:
+            self._httpd = make_server('127.0.0.1', 0, app.app, threaded=True)
+            self.url = f'http://127.0.0.1:{self._httpd.server_port}'
+            threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+        else:
+            self._uvicorn.should_exit = True
+        self.standin.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def request(self, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as response:
+            return json.load(response)
+
+    def submit(self, url, quality, **fields):
+        """POST /api/download and return the task ID"""
+        return self.request('/api/download', {'url': url, 'format': 'mp4', 'quality': quality, **fields})['task_id']
+
+    def wait(self, task_id):
+        """Block until the task is terminal; returns its final status"""
+        deadline = time.monotonic() + JOB_TIMEOUT
+        while time.monotonic() < deadline:
+            task = self.app.download_tasks.get(task_id)
+            if task is not None and task.status in self.app.TERMINAL_STATUSES:
+                return task.status
+            time.sleep(POLL_INTERVAL)
+        return 'timeout'
+
+    def run_downloads(self, jobs):
+        """Submit (url, quality, fields) jobs at once and wait for all of them"""
+        started = time.perf_counter()
+        submitted = [(time.perf_counter(), self.submit(url, quality, **fields)) for url, quality, fields in jobs]
+        finished = {}
+
+        def watch(submitted_at, task_id):
+            status = self.wait(task_id)
+            finished[task_id] = time.perf_counter() - submitted_at
+            return status
+
+        with ThreadPoolExecutor(max_workers=len(submitted)) as pool:
+            statuses = list(pool.map(lambda job: watch(*job), submitted))
+        elapsed = time.perf_counter() - started
+        errors = sum(1 for status in statuses if status != 'completed')
+        latencies = [finished[task_id] * 1000 for _, task_id in submitted]
+        files = self.app.media_index.stats()['files']
+        return self.metrics(elapsed, files, latencies, errors, self.standin.bytes_served)
+
+    @staticmethod
+    def metrics(elapsed, jobs, latencies_ms, errors, transferred):
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'jobs': jobs,
+            'errors': errors,
+            'mb_per_s': round(transferred / (1024 * 1024) / elapsed, 2) if transferred else None,
+            'jobs_per_min': round(jobs / elapsed * 60, 1),
+            'latency_ms_p50': round(percentile(latencies_ms, 50), 1),
+            'latency_ms_p99': round(percentile(latencies_ms, 99), 1)
+        }
+
+
+def single_4k(bench):
+    url = f'https://www.youtube.com/watch?v={video_id_for(1)}'
+    return bench.run_downloads([(url, QUALITY_2160, {})])
+
+
+def playlist_50(bench):
+    url = f'https://www.youtube.com/watch?v={video_id_for(1)}&list={playlist_id_for(50)}'
+    return bench.run_downloads([(url, QUALITY_360, {'download_playlist': True})])
+
+
+def concurrent_20(bench):
+    jobs = [(f'https://www.youtube.com/watch?v={video_id_for(n)}', QUALITY_720, {}) for n in range(1, 21)]
+    return bench.run_downloads(jobs)
+
+
+def info_storm(bench):
+    def lookup(n):
+        url = f'https://www.youtube.com/watch?v={video_id_for(n)}'
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f'{bench.url}/api/info?{urllib.parse.urlencode({"url": url, "mode": "lite"})}') as response:
+                response.read()
+            ok = True
+        except OSError:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=INFO_STORM_CONCURRENCY) as pool:
+        results = list(pool.map(lookup, range(1, INFO_STORM_REQUESTS + 1)))
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for _, ok in results if not ok)
+    result = bench.metrics(elapsed, len(results) - errors, [latency for latency, _ in results], errors, 0)
+    result['recorded_fixtures'] = len(bench.standin.recorded)
+    return result
+
+
+def run_scenario(name, scale, result_file):
+    """Child process: run one scenario and write its metrics to result_file"""
+    bench = Bench(scale, use_recorded=name == 'info_storm')
+    try:
+        result = globals()[name](bench)
+    finally:
+        bench.close()
+    result['peak_rss_mb'] = peak_rss_mb()
+    with open(result_file, 'w') as f:
+        json.dump(result, f)
+
+
+def run(names, scale, output):
+    results = {}
+    for name in names:
+        fd, result_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), 'scenario', name, '--scale', str(scale), '--result-file', result_file],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            if process.returncode != 0:
+                results[name] = {'failed': process.stderr.decode(errors='replace').strip().splitlines()[-1:]}
+            else:
+                with open(result_file) as f:
+                    results[name] = json.load(f)
+        finally:
+            os.remove(result_file)
+        print(f"⏱️  {name}: {json.dumps(results[name])}", file=sys.stderr)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'yt_dlp': yt_dlp.version.__version__,
+            'ffmpeg': bool(shutil.which('ffmpeg')),
+            'scale': scale
+        },
+        'scenarios': results
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    return 0 if all('failed' not in result and not result['errors'] for result in results.values()) else 1
+
+
+def record(urls):
+    """Save raw extractor results for info_storm (needs network)"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        for url in urls:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False, process=False))
+            path = os.path.join(FIXTURE_DIR, f'extract-{info["id"]}.json')
+            with open(path, 'w') as f:
+                json.dump(info, f)
+            print(f"🎙️  {info['id']} -> {path}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end throughput benchmarks against a local stand-in server')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='Run scenarios and print results as JSON')
+    run_parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Repeatable; default all')
+    run_parser.add_argument('--scale', type=float, default=1.0, help='Multiply synthetic media sizes')
+    run_parser.add_argument('--output', help='Also write the JSON report to this file')
+    record_parser = subparsers.add_parser('record', help='Record extractor results for info_storm (needs network)')
+    record_parser.add_argument('urls', nargs='+')
+    scenario_parser = subparsers.add_parser('scenario')  # internal - one scenario per process
+    scenario_parser.add_argument('name', choices=SCENARIOS)
+    scenario_parser.add_argument('--scale', type=float, default=1.0)
+    scenario_parser.add_argument('--result-file', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        return record(args.urls)
+    if args.command == 'scenario':
+        run_scenario(args.name, args.scale, args.result_file)
+        return 0
+    return run(args.scenario or SCENARIOS, args.scale, args.output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
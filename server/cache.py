@@ -0,0 +1,90 @@
+"""
+Tatarus YT Downloader - Info Cache
+In-process TTL + LRU cache for yt-dlp extraction results
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+
+class InfoCache:
+    """Size-bounded LRU cache where every entry also expires after a TTL"""
+
+    def __init__(self, max_entries=200, ttl=4 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, *keys):
+        """Value of the first of `keys` that is cached - one hit or miss in the stats either way"""
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return None
+        with self._lock:
+            for key in keys:
+                item = self._entries.get(key)
+                if item is None:
+                    continue
+                expires_at, value = item
+                if expires_at <= time.time():
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def __contains__(self, key):
+        """Whether `key` is cached and fresh - not counted in the stats"""
+        with self._lock:
+            item = self._entries.get(key)
+            return item is not None and item[0] > time.time()
+
+    def set(self, key, value, ttl=None):
+        if key is None:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+            }
+
+
+def stream_url_ttl(info, margin=600):
+    """Seconds until the first stream URL in `info` expires, minus a safety margin.
+
+    YouTube stream URLs carry an `expire` unix timestamp in the query string.
+    Returns None when no expiry can be found.
+    """
+    for fmt in info.get('formats') or []:
+        url = fmt.get('url')
+        if not url:
+            continue
+        expire = parse_qs(urlparse(url).query).get('expire')
+        if expire and expire[0].isdigit():
+            return int(expire[0]) - time.time() - margin
+    return None
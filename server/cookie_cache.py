@@ -0,0 +1,194 @@
+"""
+Tatarus YT Downloader - Cookie File Cache
+One shared Netscape cookie file per distinct cookie set, reference counted
+across the jobs using it
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def cookie_identity(cookies):
+    """Stable ID for a cookie list - jobs with the same ID share one cookie file"""
+    if not cookies:
+        return None
+    return hashlib.sha256(json.dumps(cookies, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def create_cookie_file(cookies, session_ttl=3600):
+    """Create a Netscape-formatted cookie file from list of cookies"""
+    if not cookies:
+        return None
+        
+    try:
+        fd, path = tempfile.mkstemp(suffix='.txt', text=True)
+        with os.fdopen(fd, 'w') as f:
+            f.write("# Netscape HTTP Cookie File\n")
+            f.write("# This file was generated by Tatarus YT Downloader\n\n")
+            
+            for cookie in cookies:
+                # Netscape format: domain flag path secure expiration name value
+                domain = cookie.get('domain', '')
+                # Ensure domain starts with . if it's a domain cookie
+                if not domain.startswith('.') and domain.startswith('www.'):
+                    domain = '.' + domain[4:]
+                
+                flag = 'TRUE' if domain.startswith('.') else 'FALSE'
+                cookie_path = cookie.get('path', '/')
+                secure = 'TRUE' if cookie.get('secure') else 'FALSE'
+                expiration = str(int(cookie.get('expirationDate', time.time() + session_ttl)))
+                name = cookie.get('name', '')
+                value = cookie.get('value', '')
+                
+                f.write(f"{domain}\t{flag}\t{cookie_path}\t{secure}\t{expiration}\t{name}\t{value}\n")
+        
+        return path
+    except Exception as e:
+        print(f"Error creating cookie file: {e}")
+        return None
+
+
+class _CookieFile:
+    __slots__ = ('cookie_id', 'path', 'refs', 'expires', 'last_used')
+
+    def __init__(self, cookie_id, path, expires):
+        self.cookie_id = cookie_id
+        self.path = path
+        self.refs = 0
+        self.expires = expires
+        self.last_used = time.time()
+
+
+class CookieFileCache:
+    """Cookie files keyed by `cookie_identity`.
+
+    A file is valid until the earliest `expirationDate` among its cookies
+    (cookies without one count as `session_ttl` seconds from creation).
+    Unused files are deleted once they expire or when more than
+    `max_files` are kept; a file still in use is only deleted after its
+    last job releases it. `on_expire(cookie_id)` is called whenever a
+    cookie set is dropped.
+    """
+
+    def __init__(self, max_files=32, session_ttl=3600, on_expire=None):
+        self.max_files = max_files
+        self.session_ttl = session_ttl
+        self.on_expire = on_expire
+        self._current = {}  # cookie_id -> _CookieFile
+        self._by_path = {}  # path -> _CookieFile, including retired files still in use
+        self._dropped = []  # cookie IDs to report to on_expire once the lock is released
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, cookies):
+        """Return (cookie file path, cookie ID) for `cookies`, or (None, None) if there are none"""
+        cookie_id = cookie_identity(cookies)
+        if cookie_id is None:
+            return None, None
+
+        with self._lock:
+            entry = self._current.get(cookie_id)
+            if entry is not None and entry.expires > time.time():
+                entry.refs += 1
+                entry.last_used = time.time()
+                self.hits += 1
+                return entry.path, cookie_id
+
+        # Write outside the lock - a concurrent miss for the same set just loses the race below
+        path = create_cookie_file(cookies, self.session_ttl)
+        if not path:
+            return None, None
+        now = time.time()
+        expires = min(cookie.get('expirationDate', now + self.session_ttl) for cookie in cookies)
+        fresh = _CookieFile(cookie_id, path, expires)
+        fresh.refs = 1
+
+        with self._lock:
+            entry = self._current.get(cookie_id)
+            if entry is not None and entry.expires > time.time():
+                entry.refs += 1
+                entry.last_used = time.time()
+                self.hits += 1
+                stale = [fresh]
+            else:
+                self.misses += 1
+                stale = self._retire_locked(entry) if entry is not None else []
+                self._current[cookie_id] = fresh
+                self._by_path[path] = fresh
+                stale += self._sweep_locked()
+                entry = fresh
+        self._finish(stale)
+        return entry.path, cookie_id
+
+    def release(self, path):
+        """Give back a path returned by `acquire` (None is ignored)"""
+        if path is None:
+            return
+        with self._lock:
+            entry = self._by_path.get(path)
+            if entry is None:
+                return
+            entry.refs -= 1
+            entry.last_used = time.time()
+            if self._current.get(entry.cookie_id) is not entry:
+                stale = self._retire_locked(entry)
+            else:
+                stale = self._sweep_locked()
+        self._finish(stale)
+
+    def clear(self):
+        """Delete every file that is not in use"""
+        with self._lock:
+            stale = []
+            for entry in list(self._current.values()):
+                if entry.refs <= 0:
+                    stale += self._retire_locked(entry)
+        self._finish(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'files': len(self._by_path),
+                'in_use': sum(1 for entry in self._by_path.values() if entry.refs > 0),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _retire_locked(self, entry):
+        """Stop handing out `entry`; returns it for deletion if no job holds it"""
+        if self._current.get(entry.cookie_id) is entry:
+            del self._current[entry.cookie_id]
+            self._dropped.append(entry.cookie_id)
+        if entry.refs > 0:
+            return []
+        self._by_path.pop(entry.path, None)
+        return [entry]
+
+    def _sweep_locked(self):
+        now = time.time()
+        stale = []
+        for entry in list(self._current.values()):
+            if entry.refs <= 0 and entry.expires <= now:
+                stale += self._retire_locked(entry)
+        unused = sorted((e for e in self._current.values() if e.refs <= 0), key=lambda e: e.last_used)
+        while unused and len(self._current) > self.max_files:
+            stale += self._retire_locked(unused.pop(0))
+        return stale
+
+    def _finish(self, stale):
+        """Delete retired files and report dropped cookie sets - called without the lock"""
+        for entry in stale:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        with self._lock:
+            dropped, self._dropped = self._dropped, []
+        if self.on_expire:
+            for cookie_id in dropped:
+                self.on_expire(cookie_id)
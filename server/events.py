@@ -0,0 +1,84 @@
+"""
+Tatarus YT Downloader - Task Events
+Per-task change notifications so stream handlers only wake on real updates
+"""
+
+import threading
+
+
+class TaskEvents:
+    """Version counter + condition variable per task.
+
+    Tasks are `track`ed when created and `discard`ed when removed, so
+    finished tasks leave nothing behind; publishing for a task that is
+    not tracked does nothing. Writers call `publish` after changing a
+    task; readers block in `wait` until the task's version moves past the
+    one they last saw. Readers that must not block a thread (asyncio)
+    `subscribe` a callback instead.
+    """
+
+    # Version of a task that is not tracked (never created, or removed)
+    REMOVED = -1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conditions = {}
+        self._versions = {}
+        self._subscribers = {}
+
+    def track(self, task_id):
+        with self._lock:
+            if task_id not in self._conditions:
+                self._conditions[task_id] = threading.Condition()
+                self._versions[task_id] = 0
+
+    def discard(self, task_id):
+        """Forget a removed task, waking its waiters and subscribers so they notice"""
+        with self._lock:
+            condition = self._conditions.pop(task_id, None)
+            self._versions.pop(task_id, None)
+            callbacks = list(self._subscribers.get(task_id, ()))
+        if condition is not None:
+            with condition:
+                condition.notify_all()
+        for callback in callbacks:
+            callback()
+
+    def publish(self, task_id):
+        with self._lock:
+            condition = self._conditions.get(task_id)
+            if condition is None:
+                return
+            self._versions[task_id] += 1
+            callbacks = list(self._subscribers.get(task_id, ()))
+        with condition:
+            condition.notify_all()
+        for callback in callbacks:
+            callback()
+
+    def version(self, task_id):
+        with self._lock:
+            return self._versions.get(task_id, self.REMOVED)
+
+    def subscribe(self, task_id, callback):
+        """Call `callback()` on the publishing thread after every change of the task - keep it cheap"""
+        with self._lock:
+            self._subscribers.setdefault(task_id, []).append(callback)
+
+    def unsubscribe(self, task_id, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(task_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._subscribers.pop(task_id, None)
+
+    def wait(self, task_id, last_version, timeout=None):
+        """Block until the task version differs from `last_version`; return the current version"""
+        with self._lock:
+            condition = self._conditions.get(task_id)
+        if condition is None:
+            return self.REMOVED
+        with condition:
+            condition.wait_for(lambda: self.version(task_id) != last_version, timeout=timeout)
+            return self.version(task_id)
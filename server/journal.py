@@ -0,0 +1,164 @@
+"""
+Tatarus YT Downloader - Job Journal
+Append-only write-ahead log of download jobs, replayed on restart so
+unfinished jobs resume instead of being lost with the in-memory task list
+"""
+
+import json
+import os
+import threading
+
+from tasks import TERMINAL_STATUSES
+
+
+class JobJournal:
+    """JSON-lines journal of job submissions and state transitions.
+
+    Every record is flushed and fsynced before the call returns, so a job
+    that was accepted is never lost. A torn last line (crash mid-write) is
+    ignored on replay. Once more than `compact_after` records belong to
+    finished jobs, the file is rewritten with only the live ones.
+
+    Batch parents are journaled as jobs of kind 'batch' and stay live as
+    long as one of their children does. A child that finishes is noted on
+    its parent with its final status, so a resumed batch keeps its counts.
+    """
+
+    def __init__(self, path, compact_after=500):
+        self.path = path
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._jobs = {}  # task_id -> {'job': ..., 'status': ..., 'entries': [...]}, in submission order
+        self._dead_records = 0
+        torn = self._replay()
+        self._file = self._open('a')
+        if torn:
+            # Terminate the torn line so the next record starts cleanly
+            self._file.write('\n')
+
+    def submit(self, task_id, job):
+        """Record a new job (a JSON-serialisable dict of its parameters)"""
+        with self._lock:
+            self._jobs[task_id] = {'job': job, 'status': 'queued', 'entries': []}
+            self._write({'op': 'submit', 'id': task_id, 'job': job})
+
+    def record(self, task_id, status):
+        """Record a status transition - repeated or unknown statuses are skipped"""
+        with self._lock:
+            state = self._jobs.get(task_id)
+            if state is None or state['status'] == status:
+                return
+            self._write({'op': 'status', 'id': task_id, 'status': status})
+            self._apply_status(task_id, status)
+            self._maybe_compact()
+
+    def entry_done(self, task_id, video_id):
+        """Record a finished playlist entry so a resumed job skips it"""
+        with self._lock:
+            state = self._jobs.get(task_id)
+            if state is None:
+                return
+            state['entries'].append(video_id)
+            self._write({'op': 'entry', 'id': task_id, 'video_id': video_id})
+
+    def discard(self, task_id):
+        """Forget a job that was never started (e.g. rejected by a full queue)"""
+        with self._lock:
+            if task_id in self._jobs:
+                self._write({'op': 'discard', 'id': task_id})
+                self._apply_status(task_id, None)
+                self._maybe_compact()
+
+    def pending(self):
+        """Unfinished jobs in submission order as (task_id, job, last status, finished entries).
+
+        Finished entries are video IDs for a playlist and (child task ID,
+        final status) pairs for a batch.
+        """
+        with self._lock:
+            return [
+                (task_id, state['job'], state['status'],
+                 [tuple(entry) for entry in state['entries']] if state['job']['kind'] == 'batch'
+                 else list(state['entries']))
+                for task_id, state in self._jobs.items()
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._jobs), 'dead_records': self._dead_records}
+
+    def _apply_status(self, task_id, status):
+        state = self._jobs[task_id]
+        if status is not None and status not in TERMINAL_STATUSES:
+            state['status'] = status
+            return
+        del self._jobs[task_id]
+        self._dead_records += 2 + len(state['entries'])
+        parent_id = state['job'].get('parent_id')
+        if parent_id not in self._jobs:
+            return
+        if status is not None:
+            self._jobs[parent_id]['entries'].append([task_id, status])
+        if not any(other['job'].get('parent_id') == parent_id for other in self._jobs.values()):
+            parent = self._jobs.pop(parent_id)
+            self._dead_records += 1 + len(parent['entries'])
+
+    def _replay(self):
+        """Rebuild live jobs from the file. Returns True if the last line is torn."""
+        if not os.path.exists(self.path):
+            return False
+        line = '\n'
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                task_id = record.get('id')
+                op = record.get('op')
+                if op == 'submit':
+                    self._jobs[task_id] = {'job': record['job'], 'status': 'queued', 'entries': []}
+                elif task_id not in self._jobs:
+                    self._dead_records += 1
+                elif op == 'status':
+                    self._apply_status(task_id, record['status'])
+                elif op == 'entry':
+                    self._jobs[task_id]['entries'].append(record['video_id'])
+                elif op == 'child':
+                    self._jobs[task_id]['entries'].append([record['child'], record['status']])
+                elif op == 'discard':
+                    self._apply_status(task_id, None)
+        return not line.endswith('\n')
+
+    def _open(self, mode):
+        # Jobs carry browser cookies - keep the journal private to this user
+        fd = os.open(self.path if mode == 'a' else self.path + '.tmp',
+                     os.O_WRONLY | os.O_CREAT | (os.O_APPEND if mode == 'a' else os.O_TRUNC), 0o600)
+        return os.fdopen(fd, mode, encoding='utf-8')
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _maybe_compact(self):
+        if self._dead_records <= self.compact_after:
+            return
+        with self._open('w') as f:
+            for task_id, state in self._jobs.items():
+                f.write(json.dumps({'op': 'submit', 'id': task_id, 'job': state['job']}) + '\n')
+                if state['status'] != 'queued':
+                    f.write(json.dumps({'op': 'status', 'id': task_id, 'status': state['status']}) + '\n')
+                for entry in state['entries']:
+                    if state['job']['kind'] == 'batch':
+                        child_id, status = entry
+                        record = {'op': 'child', 'id': task_id, 'child': child_id, 'status': status}
+                    else:
+                        record = {'op': 'entry', 'id': task_id, 'video_id': entry}
+                    f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(self.path + '.tmp', self.path)
+        self._file = self._open('a')
+        self._dead_records = 0
@@ -0,0 +1,76 @@
+"""
+Tatarus YT Downloader - Management Commands
+Warm up or prune the persistent metadata store
+
+Usage:
+    python manage.py warm <url> [<url> ...]
+    python manage.py prune [--all]
+    python manage.py stats
+"""
+
+import argparse
+
+from app import (
+    metadata_store, fetch_video_info, fetch_playlist_info, playlist_cursor,
+    is_playlist_url, extract_video_id, extract_playlist_id
+)
+
+
+def warm(urls):
+    """Extract each URL (and every entry of playlist URLs) into the store"""
+    for url in urls:
+        try:
+            if is_playlist_url(url):
+                playlist_id = extract_playlist_id(url)
+                entries = []
+                cursor = '0'
+                while cursor:
+                    start = int(cursor)
+                    playlist_info = fetch_playlist_info(playlist_id, use_store=False, start=start)
+                    entries += playlist_info['entries']
+                    cursor = playlist_cursor(playlist_info, start)
+                print(f"📋 {playlist_info.get('title', 'Playlist')} ({len(entries)} videos)")
+                for entry in entries:
+                    video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
+                    warm_video(video_url)
+                if extract_video_id(url):
+                    warm_video(url)
+            else:
+                warm_video(url)
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+
+
+def warm_video(url):
+    try:
+        info = fetch_video_info(url, use_store=False)
+        print(f"✅ {info.get('title', 'Unknown')}")
+    except Exception as e:
+        print(f"❌ {url}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tatarus YT Downloader management commands')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    warm_parser = subparsers.add_parser('warm', help='Extract URLs into the metadata store')
+    warm_parser.add_argument('urls', nargs='+')
+
+    prune_parser = subparsers.add_parser('prune', help='Remove stale rows from the metadata store')
+    prune_parser.add_argument('--all', action='store_true', help='Remove every row')
+
+    subparsers.add_parser('stats', help='Show metadata store row counts')
+
+    args = parser.parse_args()
+
+    if args.command == 'warm':
+        warm(args.urls)
+    elif args.command == 'prune':
+        removed = metadata_store.prune(everything=args.all)
+        print(f"🧹 Removed {removed} rows")
+    elif args.command == 'stats':
+        print(metadata_store.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Tatarus YT Downloader - Media Index
+SQLite index of completed downloads, so repeated requests for a video can
+reuse the file already on disk instead of fetching it again
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+# Selectors produced by `extract_qualities`, plus the 'best' default
+BEST_VIDEO_SELECTOR = 'bestvideo+bestaudio/best'
+CAPPED_VIDEO_SELECTOR = re.compile(r'^bestvideo\[height<=(\d+)\]\+bestaudio/best\[height<=\1\]$')
+
+
+def height_cap(selector):
+    """0 for the uncapped 'best' selector, N for a height<=N selector, None for anything else"""
+    if not isinstance(selector, str):
+        return None
+    if selector == BEST_VIDEO_SELECTOR:
+        return 0
+    match = CAPPED_VIDEO_SELECTOR.match(selector)
+    return int(match.group(1)) if match else None
+
+
+class MediaIndex:
+    """Completed downloads keyed by video ID, format type and selector.
+
+    A row is only trusted while its file still exists with the recorded
+    size and mtime; stale rows are deleted when they are looked up.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS media ('
+                ' video_id TEXT NOT NULL,'
+                ' format_type TEXT NOT NULL,'
+                ' selector TEXT NOT NULL,'
+                ' path TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' mtime REAL NOT NULL,'
+                ' height INTEGER,'
+                ' max_height INTEGER,'
+                ' abr INTEGER,'
+                ' PRIMARY KEY (video_id, format_type, selector))'
+            )
+
+    def add(self, video_id, format_type, selector, path, height=None, abr=None):
+        """Index a finished file. `height`/`abr` describe the file itself."""
+        if not video_id or not path or not os.path.exists(path):
+            return
+        stat = os.stat(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (video_id, format_type, selector, path, stat.st_size, stat.st_mtime,
+                 height, height_cap(selector), abr)
+            )
+
+    def find_video(self, video_id, selector):
+        """Path of an mp4 that `selector` would produce again, or None.
+
+        Besides an exact selector match, a file downloaded with a height cap
+        C (0 = uncapped) at height h also satisfies a request capped at H
+        when h <= H <= C - the best format under H is the same file.
+        """
+        cap = height_cap(selector)
+        rows = self._rows(video_id, 'mp4')
+        for row in rows:
+            if row['selector'] == selector:
+                return row['path']
+        if cap is None:
+            return None
+        for row in rows:
+            if row['max_height'] is None or row['height'] is None:
+                continue
+            wanted = cap or float('inf')
+            allowed = row['max_height'] or float('inf')
+            if row['height'] <= wanted <= allowed:
+                return row['path']
+        return None
+
+    def find_audio(self, video_id, abr):
+        """Path of an mp3 at exactly `abr` kbps, or None"""
+        for row in self._rows(video_id, 'mp3'):
+            if row['abr'] == abr:
+                return row['path']
+        return None
+
+    def find_native_audio(self, video_id):
+        """Path of the source audio stream kept without re-encoding (m4a/opus), or None"""
+        rows = self._rows(video_id, 'audio')
+        return rows[0]['path'] if rows else None
+
+    def audio_source(self, video_id, abr, best=False):
+        """Smallest local file an `abr` kbps mp3 can be transcoded from, or None.
+
+        Higher-bitrate mp3s, and native audio streams or mp4s (which carry
+        the audio track) of at least `abr` kbps qualify - never a lower
+        bitrate, which would only be upscaled. Sources of unknown bitrate
+        only qualify for a `best` (uncapped) request.
+        """
+        candidates = [
+            row for row in self._rows(video_id, 'mp3') if (row['abr'] or 0) > abr
+        ] + [
+            row for row in self._rows(video_id, 'audio') + self._rows(video_id, 'mp4')
+            if (row['abr'] >= abr if row['abr'] else best)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda row: row['size'])['path']
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM media').fetchone()
+        return {'files': count, 'bytes': size}
+
+    def _rows(self, video_id, format_type):
+        """Indexed rows for a video whose files are unchanged on disk"""
+        if not video_id:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT selector, path, size, mtime, height, max_height, abr FROM media'
+                ' WHERE video_id = ? AND format_type = ?',
+                (video_id, format_type)
+            ).fetchall()
+        keys = ('selector', 'path', 'size', 'mtime', 'height', 'max_height', 'abr')
+        valid, stale = [], []
+        for row in rows:
+            row = dict(zip(keys, row))
+            try:
+                stat = os.stat(row['path'])
+            except OSError:
+                stat = None
+            if stat and stat.st_size == row['size'] and stat.st_mtime == row['mtime']:
+                valid.append(row)
+            else:
+                stale.append(row['selector'])
+        if stale:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    'DELETE FROM media WHERE video_id = ? AND format_type = ? AND selector = ?',
+                    [(video_id, format_type, selector) for selector in stale]
+                )
+        return valid
@@ -0,0 +1,128 @@
+"""
+Tatarus YT Downloader - Metadata Store
+Persistent SQLite store for video/playlist metadata that survives restarts
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA_VERSION = 3
+
+# Only these fields are kept - stream URLs expire and are never persisted
+VIDEO_FIELDS = ('id', 'title', 'uploader', 'duration', 'thumbnail')
+FORMAT_FIELDS = ('format_id', 'ext', 'height', 'vcodec', 'acodec', 'abr', 'tbr', 'filesize')
+
+
+def trim_video_info(info):
+    """Reduce a yt-dlp info dict to the fields the popup needs"""
+    trimmed = {key: info.get(key) for key in VIDEO_FIELDS}
+    if not trimmed['thumbnail'] and info.get('thumbnails'):
+        # Unprocessed (process=False) results only carry the thumbnails list
+        best = max(info['thumbnails'], key=lambda t: (t.get('preference') or 0, t.get('width') or 0))
+        trimmed['thumbnail'] = best.get('url')
+    trimmed['formats'] = [trim_format(fmt) for fmt in info.get('formats') or []]
+    return trimmed
+
+
+def trim_format(fmt):
+    trimmed = {key: fmt.get(key) for key in FORMAT_FIELDS}
+    if trimmed['abr'] is None and trimmed['vcodec'] == 'none':
+        # Unprocessed results only carry tbr - yt-dlp derives abr while sorting formats
+        trimmed['abr'] = trimmed['tbr']
+    return trimmed
+
+
+def trim_playlist_info(playlist_info):
+    """Reduce a flat playlist info dict to its title and entry list"""
+    return {
+        'id': playlist_info.get('id'),
+        'title': playlist_info.get('title', 'Playlist'),
+        'playlist_count': playlist_info.get('playlist_count'),
+        'entries': [
+            {
+                'id': entry.get('id', ''),
+                'title': entry.get('title', 'Unknown'),
+                'duration': entry.get('duration', 0)
+            }
+            for entry in playlist_info.get('entries') or [] if entry
+        ]
+    }
+
+
+class MetadataStore:
+    """Versioned key/value store for trimmed video and playlist metadata.
+
+    Rows written by a different schema or yt-dlp version are treated as
+    missing, so upgrading yt-dlp invalidates everything extracted before.
+    Rows expire after `max_age` seconds, or after `kind_max_age[kind]` for
+    kinds whose data goes stale sooner.
+    """
+
+    def __init__(self, path, extractor_version, max_age=7 * 24 * 3600, kind_max_age=None):
+        self.path = path
+        self.version = f'{SCHEMA_VERSION}:{extractor_version}'
+        self.max_age = max_age
+        self.kind_max_age = dict(kind_max_age or {})
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                ' kind TEXT NOT NULL,'
+                ' item_id TEXT NOT NULL,'
+                ' version TEXT NOT NULL,'
+                ' updated REAL NOT NULL,'
+                ' data TEXT NOT NULL,'
+                ' PRIMARY KEY (kind, item_id))'
+            )
+
+    def get(self, kind, item_id):
+        if not item_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT version, updated, data FROM metadata WHERE kind = ? AND item_id = ?',
+                (kind, item_id)
+            ).fetchone()
+        if row is None:
+            return None
+        version, updated, data = row
+        if version != self.version or time.time() - updated > self.kind_max_age.get(kind, self.max_age):
+            return None
+        return json.loads(data)
+
+    def put(self, kind, item_id, data):
+        if not item_id:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO metadata (kind, item_id, version, updated, data) VALUES (?, ?, ?, ?, ?)',
+                (kind, item_id, self.version, time.time(), json.dumps(data))
+            )
+
+    def prune(self, everything=False):
+        """Delete stale rows (or every row). Returns the number removed."""
+        with self._lock, self._conn:
+            if everything:
+                return self._conn.execute('DELETE FROM metadata').rowcount
+            now = time.time()
+            removed = self._conn.execute(
+                'DELETE FROM metadata WHERE version != ? OR updated < ?',
+                (self.version, now - self.max_age)
+            ).rowcount
+            for kind, max_age in self.kind_max_age.items():
+                removed += self._conn.execute(
+                    'DELETE FROM metadata WHERE kind = ? AND updated < ?',
+                    (kind, now - max_age)
+                ).rowcount
+        return removed
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT kind, COUNT(*) FROM metadata WHERE version = ? GROUP BY kind',
+                (self.version,)
+            ).fetchall()
+        return {kind: count for kind, count in rows}
@@ -0,0 +1,135 @@
+"""
+Tatarus YT Downloader - Metrics
+Minimal Prometheus-style counters, histograms and gauges, rendered in the
+text exposition format for /metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds - from a cached lookup up to a long download
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# Size buckets in bytes - 1 MiB to 4 GiB
+BYTE_BUCKETS = tuple(2 ** power for power in range(20, 33, 2))
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Bucketed observations. `observe` is a bisect and three increments under a lock."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the wall time of the `with` block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames, labels, [('le', _number(bound))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Gauge:
+    """Value read from `fn()` at scrape time, so nothing is recorded on the hot path"""
+
+    def __init__(self, name, documentation, fn):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def render(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge',
+                f'{self.name} {_number(self.fn())}']
+
+
+class MetricsRegistry:
+    """Named metrics with a common prefix"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(f'{self.prefix}_{name}', documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        return self._add(Histogram(f'{self.prefix}_{name}', documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, fn):
+        return self._add(Gauge(f'{self.prefix}_{name}', documentation, fn))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
@@ -0,0 +1,77 @@
+"""
+Tatarus YT Downloader - Post-processing Pipeline
+Lets the network fetch and the ffmpeg post-processing (merge, audio extract)
+of a download run as separate stages with their own concurrency limits. The
+YoutubeDL side of the split is `staged_ydl.StagedYoutubeDL`.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class CpuTimer:
+    """CPU seconds used by a processing job - its own thread plus the ffmpeg runs it waited for.
+
+    Child CPU time is process-wide, so jobs overlapping on the pool can
+    pick up part of each other's ffmpeg time. Without the `resource`
+    module (Windows) only the thread itself is counted.
+    """
+
+    def __init__(self):
+        self.seconds = None
+        self._started = None
+
+    def __enter__(self):
+        self._started = self._now()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = round(self._now() - self._started, 3)
+
+    @staticmethod
+    def _now():
+        seconds = time.thread_time()
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            seconds += usage.ru_utime + usage.ru_stime
+        return seconds
+
+
+class ProcessingPool:
+    """Bounded pool for post-processing jobs.
+
+    Each job drives ffmpeg subprocesses, so `max_workers` caps how many
+    transcodes run at once independently of the download slots.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='processing')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def submit(self, fn, *args):
+        with self._lock:
+            self._queued += 1
+        return self._executor.submit(self._run, fn, args)
+
+    def stats(self):
+        with self._lock:
+            return {'max_workers': self.max_workers, 'running': self._running, 'queued': self._queued}
+
+    def _run(self, fn, args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
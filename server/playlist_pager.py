@@ -0,0 +1,99 @@
+"""
+Tatarus YT Downloader - Playlist Pager
+Lazy playlist enumerations kept open between page requests, so the next
+page continues where the last one stopped instead of re-walking the
+playlist from the start
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Listing:
+    __slots__ = ('info', 'entries', 'close', 'last_used')
+
+    def __init__(self, info, entries, close):
+        self.info = info
+        self.entries = entries
+        self.close = close
+        self.last_used = time.time()
+
+
+class PlaylistPager:
+    """Open enumerations keyed by (playlist ID, cookie ID, offset of the next entry).
+
+    `open_listing(playlist_id, cookie_file)` starts a lazy enumeration and
+    returns (playlist info, iterator of entries, close callable). A page
+    request takes the listing parked at its offset, or opens a new one and
+    skips to the offset - the slow path, only for cursors whose listing has
+    expired. While a request reads a listing nobody else can see it.
+
+    Listings idle for longer than `idle_ttl`, or beyond `max_open`, are
+    closed (oldest first).
+    """
+
+    def __init__(self, open_listing, max_open=8, idle_ttl=600):
+        self.open_listing = open_listing
+        self.max_open = max_open
+        self.idle_ttl = idle_ttl
+        self.resumed = 0
+        self.opened = 0
+        self._listings = OrderedDict()  # (playlist_id, cookie_id, offset) -> _Listing, oldest first
+        self._lock = threading.Lock()
+
+    def page(self, playlist_id, start, size, cookie_file=None, cookie_id=None):
+        """Return (playlist info, up to `size` entries from offset `start`, has_more)"""
+        with self._lock:
+            listing = self._listings.pop((playlist_id, cookie_id, start), None)
+            if listing is not None:
+                self.resumed += 1
+            else:
+                self.opened += 1
+        if listing is None:
+            listing = _Listing(*self.open_listing(playlist_id, cookie_file))
+            listing.entries = itertools.islice(listing.entries, start, None)
+
+        try:
+            # One entry past the page tells whether there is a next one
+            entries = list(itertools.islice(listing.entries, size + 1))
+        except BaseException:
+            listing.close()
+            raise
+        has_more = len(entries) > size
+        if has_more:
+            listing.entries = itertools.chain(entries[size:], listing.entries)
+            self._park((playlist_id, cookie_id, start + size), listing)
+        else:
+            listing.close()
+        return listing.info, entries[:size], has_more
+
+    def clear(self):
+        """Close every parked listing"""
+        with self._lock:
+            listings = list(self._listings.values())
+            self._listings.clear()
+        for listing in listings:
+            listing.close()
+
+    def stats(self):
+        with self._lock:
+            return {'open': len(self._listings), 'max_open': self.max_open,
+                    'resumed': self.resumed, 'opened': self.opened}
+
+    def _park(self, key, listing):
+        listing.last_used = time.time()
+        cutoff = listing.last_used - self.idle_ttl
+        with self._lock:
+            stale = self._listings.pop(key, None)
+            self._listings[key] = listing
+            expired = [stale] if stale is not None else []
+            while self._listings:
+                oldest_key, oldest = next(iter(self._listings.items()))
+                if len(self._listings) <= self.max_open and oldest.last_used >= cutoff:
+                    break
+                del self._listings[oldest_key]
+                expired.append(oldest)
+        for stale in expired:
+            stale.close()
@@ -0,0 +1,302 @@
+"""
+Tatarus YT Downloader - On-demand Profiling
+Sampling profiler and phase timeline for a single download task or the
+next N info requests, switched on at runtime from the admin API
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, nullcontext
+
+
+class _Session:
+    __slots__ = ('session_id', 'key', 'kind', 'started', 'deadline', 'finished', 'remaining', 'active_requests',
+                 'samples', 'stacks', 'timeline', 'open_spans')
+
+    def __init__(self, session_id, key, kind, seconds, remaining=None):
+        self.session_id = session_id
+        self.key = key
+        self.kind = kind
+        self.started = time.time()
+        self.deadline = self.started + seconds
+        self.finished = None
+        self.remaining = remaining
+        self.active_requests = 0
+        self.samples = 0
+        self.stacks = Counter()
+        self.timeline = []  # [name, start, end, thread name]
+        self.open_spans = {}  # name -> timeline entry
+
+    def summary(self):
+        return {
+            'session_id': self.session_id,
+            'kind': self.kind,
+            'target': self.key if self.kind == 'task' else None,
+            'started': self.started,
+            'finished': self.finished,
+            'samples': self.samples,
+            'pending_requests': self.remaining if self.kind == 'info' else None
+        }
+
+
+class Profiler:
+    """Samples the stacks of the threads working for a profiled target.
+
+    Code that works for a target (a task ID, or an info request) runs
+    inside `attach(key)`, which only records the thread ident - so jobs
+    that were already running can be profiled too. While any session is
+    active a sampler thread walks those threads' frames every `interval`
+    seconds; with none active nothing else runs. `span`/`begin`/`end`
+    add phase timeline entries and return at once when nothing is
+    being profiled.
+
+    Task sessions end when `is_finished(task_id)` says so, info sessions
+    after their N requests, and either one after `seconds` at most. The
+    last `max_sessions` results are kept for download.
+    """
+
+    def __init__(self, interval=0.01, max_sessions=20, is_finished=None):
+        self.interval = interval
+        self.max_sessions = max_sessions
+        self.is_finished = is_finished
+        self._active = {}  # key -> running _Session
+        self._results = OrderedDict()  # session_id -> _Session, running or finished
+        self._threads = {}  # key -> Counter of thread idents attached to it
+        self._info_session = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    # ---- admin ------------------------------------------------------------
+
+    def profile_task(self, task_id, seconds):
+        """Start profiling a task (queued or running); returns the session ID"""
+        with self._lock:
+            session = self._active.get(task_id)
+            if session is None:
+                session = self._open_locked(_Session(task_id, task_id, 'task', seconds))
+            return session.session_id
+
+    def profile_info(self, count, seconds):
+        """Profile the next `count` info requests as one session; returns the session ID"""
+        session_id = f'info-{uuid.uuid4().hex[:8]}'
+        with self._lock:
+            if self._info_session is not None:
+                self._close_locked(self._info_session)
+            self._info_session = self._open_locked(_Session(session_id, session_id, 'info', seconds, remaining=count))
+        return session_id
+
+    def stop(self, session_id):
+        """Stop a running session - returns False if there is no such session"""
+        with self._lock:
+            session = self._results.get(session_id)
+            if session is None:
+                return False
+            if session.finished is None:
+                self._close_locked(session)
+            return True
+
+    def sessions(self):
+        with self._lock:
+            return [session.summary() for session in self._results.values()]
+
+    def timeline(self, session_id):
+        """Phase timeline of a session (seconds from its start), or None"""
+        with self._lock:
+            session = self._results.get(session_id)
+            if session is None:
+                return None
+            end = session.finished or time.time()
+            return {
+                **session.summary(),
+                'duration': round(end - session.started, 3),
+                'phases': [
+                    {'name': name, 'thread': thread,
+                     'start': round(start - session.started, 4),
+                     'end': round(stop - session.started, 4) if stop is not None else None}
+                    for name, start, stop, thread in session.timeline
+                ]
+            }
+
+    def folded(self, session_id):
+        """Sampled stacks in folded format ("frame;frame;... count"), or None"""
+        with self._lock:
+            session = self._results.get(session_id)
+            if session is None:
+                return None
+            stacks = session.stacks.most_common()
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+    # ---- instrumentation ----------------------------------------------------
+
+    @contextmanager
+    def attach(self, key):
+        """Mark the current thread as working for `key` for the duration of the block"""
+        ident = threading.get_ident()
+        previous = getattr(self._local, 'key', None)
+        with self._lock:
+            self._threads.setdefault(key, Counter())[ident] += 1
+        self._local.key = key
+        try:
+            yield
+        finally:
+            self._local.key = previous
+            with self._lock:
+                threads = self._threads[key]
+                threads[ident] -= 1
+                if threads[ident] <= 0:
+                    del threads[ident]
+                if not threads:
+                    del self._threads[key]
+
+    def bound(self, key, fn):
+        """`fn` wrapped to run attached to `key` - for handing work to another thread"""
+        def run(*args, **kwargs):
+            with self.attach(key):
+                return fn(*args, **kwargs)
+        return run
+
+    def profiling(self, key):
+        """True while `key` has a running session - a dict lookup, for guarding hot paths"""
+        return key in self._active
+
+    def info_request(self, label=''):
+        """Context for one info request - profiled while an info session has requests left"""
+        if self._info_session is None:
+            return nullcontext()
+        with self._lock:
+            session = self._info_session
+            if session is None or session.remaining <= 0:
+                return nullcontext()
+            session.remaining -= 1
+            session.active_requests += 1
+        return self._info_request(session, f'request {label}'.strip())
+
+    @contextmanager
+    def _info_request(self, session, name):
+        try:
+            with self.attach(session.key), self.span(name):
+                yield
+        finally:
+            with self._lock:
+                session.active_requests -= 1
+                if session.remaining <= 0 and session.active_requests <= 0 and session.finished is None:
+                    self._close_locked(session)
+
+    def span(self, name, key=None):
+        """Timeline entry covering the block (key defaults to the thread's attached target)"""
+        if not self._active:
+            return nullcontext()
+        return self._span(key or getattr(self._local, 'key', None), name)
+
+    @contextmanager
+    def _span(self, key, name):
+        # Block spans are per thread, so concurrent requests can use the same names
+        slot = (name, threading.get_ident())
+        self.begin(key, name, slot)
+        try:
+            yield
+        finally:
+            self.end(key, slot)
+
+    def begin(self, key, name, slot=None):
+        """Open a timeline entry that `end(key, slot)` closes - from any thread; slot defaults to the name"""
+        if key not in self._active:
+            return
+        with self._lock:
+            session = self._active.get(key)
+            if session is not None and (slot or name) not in session.open_spans:
+                entry = [name, time.time(), None, threading.current_thread().name]
+                session.timeline.append(entry)
+                session.open_spans[slot or name] = entry
+
+    def end(self, key, slot):
+        if key not in self._active:
+            return
+        with self._lock:
+            session = self._active.get(key)
+            entry = session.open_spans.pop(slot, None) if session is not None else None
+            if entry is not None:
+                entry[2] = time.time()
+
+    def record(self, key, name, start, end):
+        """Add a phase that has already finished"""
+        if key not in self._active:
+            return
+        with self._lock:
+            session = self._active.get(key)
+            if session is not None:
+                session.timeline.append([name, start, end, threading.current_thread().name])
+
+    # ---- internals ----------------------------------------------------------
+
+    def _open_locked(self, session):
+        self._active[session.key] = session
+        self._results[session.session_id] = session
+        while len(self._results) > self.max_sessions:
+            oldest_id, oldest = next(iter(self._results.items()))
+            if oldest.finished is None:
+                self._close_locked(oldest)
+            del self._results[oldest_id]
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+            self._sampler.start()
+        return session
+
+    def _close_locked(self, session):
+        session.finished = time.time()
+        for entry in session.open_spans.values():
+            entry[2] = session.finished
+        session.open_spans.clear()
+        if self._active.get(session.key) is session:
+            del self._active[session.key]
+        if self._info_session is session:
+            self._info_session = None
+
+    def _sample_loop(self):
+        next_check = 0
+        while True:
+            time.sleep(self.interval)
+            now = time.time()
+            if now >= next_check:
+                self._expire(now)
+                next_check = now + 0.5
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                for key, session in self._active.items():
+                    for ident in self._threads.get(key, ()):
+                        frame = frames.get(ident)
+                        if frame is not None:
+                            session.stacks[self._fold(names.get(ident, str(ident)), frame)] += 1
+                            session.samples += 1
+
+    def _expire(self, now):
+        with self._lock:
+            sessions = list(self._active.values())
+        finished = [
+            session for session in sessions
+            if now >= session.deadline or (session.kind == 'task' and self.is_finished and self.is_finished(session.key))
+        ]
+        if finished:
+            with self._lock:
+                for session in finished:
+                    if session.finished is None:
+                        self._close_locked(session)
+
+    @staticmethod
+    def _fold(thread_name, frame, max_depth=128):
+        frames = []
+        while frame is not None and len(frames) < max_depth:
+            code = frame.f_code
+            frames.append(f'{code.co_name}({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ';'.join(reversed(frames)).replace(' ', '_')
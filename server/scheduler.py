@@ -0,0 +1,135 @@
+"""
+Tatarus YT Downloader - Download Scheduler
+Bounded worker pool with a priority queue and admission control
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue cannot accept more jobs"""
+
+    def __init__(self, retry_after):
+        super().__init__('Download queue is full')
+        self.retry_after = retry_after
+
+
+class DownloadScheduler:
+    """Fixed-size pool of worker threads fed from a priority queue.
+
+    Jobs with a lower priority value run first; jobs with the same
+    priority run in FIFO order.
+    """
+
+    def __init__(self, max_workers=3, max_queue=20):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._queue = []
+        self._queued_ids = {}
+        self._running = set()
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._avg_duration = 30.0
+
+    def start(self):
+        """Start worker threads (idempotent)"""
+        with self._cond:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._run, name=f'download-worker-{i}', daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def submit(self, task_id, target, args=(), priority=0):
+        """Queue a job and return its 1-based queue position"""
+        self.start()
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                raise QueueFullError(self.retry_after())
+            entry = [priority, next(self._counter), task_id, target, args]
+            heapq.heappush(self._queue, entry)
+            self._queued_ids[task_id] = entry
+            self._cond.notify()
+            return self._position_locked(entry)
+
+    def submit_many(self, jobs, priority=0, force=False):
+        """Queue several (task_id, target, args) jobs atomically as one admission.
+
+        The group is admitted when the queue has room for at least one job,
+        so a batch may temporarily grow the queue past `max_queue`. `force`
+        skips admission control for jobs that were already admitted once.
+        Returns the queue position of each job.
+        """
+        self.start()
+        with self._cond:
+            if not force and len(self._queue) >= self.max_queue:
+                raise QueueFullError(self.retry_after())
+            entries = []
+            for task_id, target, args in jobs:
+                entry = [priority, next(self._counter), task_id, target, args]
+                heapq.heappush(self._queue, entry)
+                self._queued_ids[task_id] = entry
+                entries.append(entry)
+            self._cond.notify(len(entries))
+            return [self._position_locked(entry) for entry in entries]
+
+    def cancel(self, task_id):
+        """Remove a queued job. Returns False if it is not waiting in the queue."""
+        with self._cond:
+            entry = self._queued_ids.pop(task_id, None)
+            if entry is None:
+                return False
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            return True
+
+    def position(self, task_id):
+        """1-based queue position, 0 if running, None if unknown"""
+        with self._cond:
+            entry = self._queued_ids.get(task_id)
+            if entry is not None:
+                return self._position_locked(entry)
+            if task_id in self._running:
+                return 0
+            return None
+
+    def retry_after(self):
+        """Rough number of seconds until a queue slot frees up"""
+        return max(5, int(self._avg_duration / max(1, self.max_workers)))
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': len(self._running),
+                'queued': len(self._queue)
+            }
+
+    def _position_locked(self, entry):
+        key = entry[:2]
+        return 1 + sum(1 for other in self._queue if other[:2] < key)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _, _, task_id, target, args = heapq.heappop(self._queue)
+                self._queued_ids.pop(task_id, None)
+                self._running.add(task_id)
+
+            started = time.time()
+            try:
+                target(task_id, *args)
+            except Exception as e:
+                print(f"Scheduler job {task_id} crashed: {e}")
+            finally:
+                with self._cond:
+                    self._running.discard(task_id)
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.time() - started)
@@ -0,0 +1,48 @@
+"""
+Tatarus YT Downloader - Staged YoutubeDL
+YoutubeDL that defers post-processing to the processing stage (see pipeline.py).
+Importing this module imports yt_dlp, so the server only does it on first use.
+"""
+
+import yt_dlp
+from yt_dlp.postprocessor import MoveFilesAfterDownloadPP
+from yt_dlp.utils import DownloadCancelled
+
+
+class StagedYoutubeDL(yt_dlp.YoutubeDL):
+    """YoutubeDL that can hand post-processing off instead of running it inline.
+
+    With the `defer_post_process` param set, each downloaded file's
+    post-processing is queued in `deferred` and the download returns
+    straight away. `run_deferred` runs it later, one postprocessor at a time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deferred = []
+
+    def post_process(self, filename, info, files_to_move=None):
+        if not self.params.get('defer_post_process'):
+            return super().post_process(filename, info, files_to_move)
+        info['filepath'] = filename
+        self.deferred.append((filename, dict(info), files_to_move))
+        return info
+
+    def take_deferred(self):
+        deferred, self.deferred = self.deferred, []
+        return deferred
+
+    def run_deferred(self, filename, info, files_to_move, on_step=None, is_cancelled=None):
+        """Same steps as `YoutubeDL.post_process`, reporting on_step(done, total, pp name) after each one"""
+        info['filepath'] = filename
+        info['__files_to_move'] = files_to_move or {}
+        steps = (info.get('__postprocessors') or []) + self._pps['post_process']
+        for done, pp in enumerate(steps, 1):
+            if is_cancelled and is_cancelled():
+                raise DownloadCancelled()
+            info = self.run_pp(pp, info)
+            if on_step:
+                on_step(done, len(steps), pp.pp_key())
+        info = self.run_pp(MoveFilesAfterDownloadPP(self), info)
+        del info['__files_to_move']
+        return self.run_all_pps('after_move', info)
@@ -0,0 +1,174 @@
+"""
+Tatarus YT Downloader - Task Registry
+Thread-safe store of download task records with eviction of finished tasks
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+TERMINAL_STATUSES = ('completed', 'error', 'cancelled')
+
+
+class DownloadTask:
+    """Compact record for one download job"""
+
+    __slots__ = (
+        'status', 'progress', 'speed', 'eta', 'downloaded_bytes', 'total_bytes', 'avg_speed',
+        'processing_progress', 'cpu_seconds', 'engine', 'filename', 'error', 'is_playlist', 'is_batch', 'cancelled', 'queue_position',
+        'current', 'total', 'current_title', 'playlist_title', 'active_titles',
+        'children', 'completed_count', 'failed_count', 'parent_id', 'created_at', 'finished_at'
+    )
+
+    # Fields only reported for playlist / batch tasks
+    PLAYLIST_FIELDS = ('current', 'total', 'current_title', 'playlist_title', 'active_titles')
+    BATCH_FIELDS = ('children', 'completed_count', 'failed_count')
+    INTERNAL_FIELDS = ('parent_id', 'created_at', 'finished_at')
+
+    def __init__(self, is_playlist=False, **fields):
+        self.status = 'queued'
+        self.progress = 0
+        self.speed = None
+        self.eta = None
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.avg_speed = None
+        self.processing_progress = None
+        self.cpu_seconds = None
+        self.engine = None
+        self.filename = None
+        self.error = None
+        self.is_playlist = is_playlist
+        self.is_batch = False
+        self.cancelled = False
+        self.queue_position = None
+        self.current = 0
+        self.total = 0
+        self.current_title = ''
+        self.playlist_title = ''
+        self.active_titles = []
+        self.children = []
+        self.completed_count = 0
+        self.failed_count = 0
+        self.parent_id = None
+        self.created_at = time.time()
+        self.finished_at = None
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def to_dict(self):
+        skipped = self.INTERNAL_FIELDS
+        if not self.is_playlist:
+            skipped += self.PLAYLIST_FIELDS
+        if not self.is_batch:
+            skipped += self.BATCH_FIELDS
+        return {name: getattr(self, name) for name in self.__slots__ if name not in skipped}
+
+
+class TaskRegistry:
+    """Locked task store with a status index.
+
+    Tasks that reach a terminal status are evicted once there are more
+    than `max_finished` of them or they are older than `finished_ttl`.
+    Child tasks of a batch are evicted together with their parent.
+    `on_create` / `on_remove` are called with the task ID under the
+    registry lock, `on_update` after the change outside it.
+    """
+
+    def __init__(self, max_finished=100, finished_ttl=3600, on_update=None, on_create=None, on_remove=None):
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.on_update = on_update
+        self.on_create = on_create
+        self.on_remove = on_remove
+        self._tasks = {}
+        self._by_status = {}
+        self._finished = OrderedDict()  # task_id -> finished_at, oldest first
+        self._lock = threading.RLock()
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def create(self, task_id, is_playlist=False, **fields):
+        task = DownloadTask(is_playlist=is_playlist, **fields)
+        with self._lock:
+            self._tasks[task_id] = task
+            self._by_status.setdefault(task.status, set()).add(task_id)
+            if self.on_create:
+                self.on_create(task_id)
+            self._evict()
+        return task
+
+    def remove(self, task_id):
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            if task is not None:
+                self._by_status.get(task.status, set()).discard(task_id)
+                self._finished.pop(task_id, None)
+                if self.on_remove:
+                    self.on_remove(task_id)
+                for child_id in task.children:
+                    self.remove(child_id)
+
+    def update(self, task_id, **fields):
+        """Set fields on a task. Updates to evicted tasks are ignored."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            old_status = task.status
+            for name, value in fields.items():
+                setattr(task, name, value)
+            if task.status != old_status:
+                self._by_status.get(old_status, set()).discard(task_id)
+                self._by_status.setdefault(task.status, set()).add(task_id)
+                if (task.status in TERMINAL_STATUSES and task.parent_id is None
+                        and task_id not in self._finished):
+                    task.finished_at = time.time()
+                    self._finished[task_id] = task.finished_at
+                    self._evict()
+        if self.on_update:
+            self.on_update(task_id)
+        return task
+
+    def snapshot(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            data = task.to_dict()
+            if task.is_batch:
+                data['children'] = [
+                    {
+                        'task_id': child_id,
+                        'status': child.status,
+                        'progress': child.progress,
+                        'filename': child.filename,
+                        'error': child.error
+                    }
+                    for child_id, child in ((child_id, self._tasks.get(child_id)) for child_id in task.children)
+                    if child is not None
+                ]
+            return data
+
+    def is_cancelled(self, task_id):
+        task = self._tasks.get(task_id)
+        return task is None or task.cancelled
+
+    def status_counts(self):
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items() if ids}
+
+    def _evict(self):
+        cutoff = time.time() - self.finished_ttl
+        while self._finished:
+            task_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and finished_at >= cutoff:
+                break
+            self.remove(task_id)
@@ -0,0 +1,210 @@
+"""
+Tatarus YT Downloader - YoutubeDL Pool
+Reusable YoutubeDL instances keyed by option profile, so extractor setup,
+cookie jars and HTTP keep-alive connections survive across jobs. yt_dlp is
+only imported when the first instance is built.
+"""
+
+import contextlib
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Params read at run time rather than in YoutubeDL.__init__, so they can be
+# set per checkout without building a new instance
+RUNTIME_PARAMS = (
+    'playliststart', 'playlistend', 'defer_post_process',
+    'concurrent_fragment_downloads', 'http_chunk_size', 'external_downloader', 'external_downloader_args',
+    'buffersize', 'noresizebuffer'
+)
+
+
+def yt_dlp_version():
+    """Installed yt-dlp version, read from yt_dlp/version.py without importing the package"""
+    spec = importlib.util.find_spec('yt_dlp')
+    locations = spec.submodule_search_locations if spec else None
+    path = os.path.join(locations[0], 'version.py') if locations else None
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            match = re.search(r"^__version__ = '([^']+)'", f.read(), re.MULTILINE)
+        if match:
+            return match.group(1)
+    from yt_dlp.version import __version__
+    return __version__
+
+
+def default_factory(opts):
+    import yt_dlp
+    return yt_dlp.YoutubeDL(opts)
+
+
+class YoutubeDLPool:
+    """Idle YoutubeDL instances grouped by (profile, cookie identity).
+
+    A checked-out instance is used by one job at a time. Per-job progress
+    hooks and runtime params are removed again on check-in. Instances are
+    dropped when the job fails with a non-yt-dlp exception, and idle ones
+    are closed once there are more than `max_idle` of them or they have
+    been idle for longer than `idle_ttl`. `warm` builds an instance ahead
+    of its first checkout.
+    """
+
+    def __init__(self, max_idle=16, idle_ttl=600, factory=None):
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self.factory = factory
+        self._idle = OrderedDict()  # (key, serial) -> (ydl, returned_at), oldest first
+        self._warming = {}  # key -> Event set once its warm-up build is done
+        self._serial = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @contextlib.contextmanager
+    def checkout(self, profile, opts, cookie_id=None, progress_hooks=(), **runtime):
+        """Yield a YoutubeDL for `profile`, building it from `opts` if none is idle.
+
+        `opts` must be the same for every checkout of a (profile, cookie_id)
+        pair - it is only used when a new instance is built.
+        """
+        unknown = set(runtime) - set(RUNTIME_PARAMS)
+        if unknown:
+            raise ValueError(f'Not a runtime param: {", ".join(sorted(unknown))}')
+
+        from yt_dlp.utils import YoutubeDLError
+
+        key = (profile, cookie_id)
+        ydl = self._take(key)
+        if ydl is None:
+            # An instance being warmed up is ready sooner than a second one built alongside it
+            warming = self._warming.get(key)
+            if warming is not None:
+                warming.wait()
+                ydl = self._take(key)
+        if ydl is None:
+            ydl = self._build(opts)
+
+        hook_count = len(ydl._progress_hooks)
+        for hook in progress_hooks:
+            ydl.add_progress_hook(hook)
+        saved = {name: ydl.params[name] for name in runtime if name in ydl.params}
+        ydl.params.update(runtime)
+
+        reusable = True
+        try:
+            yield ydl
+        except YoutubeDLError:
+            raise
+        except BaseException:
+            reusable = False
+            raise
+        finally:
+            del ydl._progress_hooks[hook_count:]
+            for name in runtime:
+                if name in saved:
+                    ydl.params[name] = saved[name]
+                else:
+                    ydl.params.pop(name, None)
+            ydl._download_retcode = 0
+            if hasattr(ydl, 'take_deferred'):
+                ydl.take_deferred()
+            if reusable:
+                self._give(key, ydl)
+            else:
+                self._close(ydl)
+
+    def warm(self, profile, opts, cookie_id=None, prepare=None):
+        """Build an idle instance for `profile` now, calling `prepare(ydl)` on it too.
+
+        Checkouts of the same profile that find nothing idle meanwhile wait
+        for this instance. Does nothing if one is already idle or warming.
+        """
+        key = (profile, cookie_id)
+        with self._lock:
+            if key in self._warming or any(idle_key[0] == key for idle_key in self._idle):
+                return
+            warming = self._warming[key] = threading.Event()
+        try:
+            ydl = self._build(opts)
+            if prepare:
+                prepare(ydl)
+            self._give(key, ydl)
+        finally:
+            with self._lock:
+                del self._warming[key]
+            warming.set()
+
+    def clear(self):
+        """Close every idle instance (and its connections)"""
+        with self._lock:
+            idle = [ydl for ydl, _ in self._idle.values()]
+            self._idle.clear()
+        for ydl in idle:
+            self._close(ydl)
+
+    def discard(self, cookie_id):
+        """Close idle instances built with the given cookie identity"""
+        with self._lock:
+            keys = [idle_key for idle_key in self._idle if idle_key[0][1] == cookie_id]
+            dropped = [self._idle.pop(idle_key)[0] for idle_key in keys]
+        for ydl in dropped:
+            self._close(ydl)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'idle': len(self._idle),
+                'profiles': len({key for key, _ in self._idle}),
+                'created': self.created,
+                'reused': self.reused
+            }
+
+    def _build(self, opts):
+        ydl = (self.factory or default_factory)(opts)
+        ydl.cookiejar  # load now - the cookie file may be a temp file deleted after this job
+        with self._lock:
+            self.created += 1
+        return ydl
+
+    def _take(self, key):
+        found = None
+        with self._lock:
+            evicted = self._expire_locked()
+            for idle_key in reversed(self._idle):
+                if idle_key[0] == key:
+                    found, _ = self._idle.pop(idle_key)
+                    self.reused += 1
+                    break
+        for old in evicted:
+            self._close(old)
+        return found
+
+    def _give(self, key, ydl):
+        with self._lock:
+            self._serial += 1
+            self._idle[(key, self._serial)] = (ydl, time.time())
+            evicted = self._expire_locked()
+        for old in evicted:
+            self._close(old)
+
+    def _expire_locked(self):
+        cutoff = time.time() - self.idle_ttl
+        evicted = []
+        while self._idle:
+            idle_key, (ydl, returned_at) = next(iter(self._idle.items()))
+            if len(self._idle) <= self.max_idle and returned_at >= cutoff:
+                break
+            del self._idle[idle_key]
+            evicted.append(ydl)
+        return evicted
+
+    def _close(self, ydl):
+        # The cookie file may be a deleted temp file - don't write it back
+        ydl.params['cookiefile'] = None
+        try:
+            ydl.close()
+        except Exception as e:
+            print(f"Error closing YoutubeDL instance: {e}")
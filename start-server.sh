@@ -32,4 +32,4 @@ pip3 install -r requirements.txt -q 2>/dev/null
 
 echo "[OK] Starting server..."
 echo ""
-python3 app.py
+python3 asgi.py